@@ -2,33 +2,28 @@
 import streamlit as st
 import os
 import random
-from datetime import date
-from io import BytesIO
+from datetime import date, timedelta
 from dotenv import load_dotenv
-import google.generativeai as genai 
-
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import simpleSplit
-
-from database import init_db, add_post, get_posts, register_user, login_user, get_user, update_user,  add_draft, get_drafts, delete_draft, get_user_stats
-import base64
-import pandas as pd
-import matplotlib.pyplot as plt
-from openpyxl import Workbook
-import bcrypt
-import mysql.connector
-import json
-import pyperclip
+from mysql.connector import Error
+
+from database import init_db, add_post, register_user, login_user, get_user, update_user,  add_draft, get_drafts, delete_draft, get_user_stats
+from database import get_posts_page, get_drafts_page, get_avatar, add_posts, iter_posts, PAGE_SIZE
+from database import get_post_date_range, get_monthly_post_stats, get_word_count_distribution, get_top_hashtags, get_posts_version, get_posts_schedule_page
+from database import get_post_counts_by_day, get_posts_between, get_undated_posts, count_undated_posts
+from llm import get_backend, fallback_post
+from resilience import CircuitOpenError, RateLimitedError, get_llm_stats
+from planner import CADENCES, BATCH_MAX_WORKERS, plan_dates, generate_batch
 import re                                               # for email validation
 
+# Heavy dependencies (pandas, matplotlib via charts.py, reportlab via
+# pdf_export.py, openpyxl/pyarrow via exports.py, pyperclip) are imported in
+# the tabs that use them, so the login page doesn't pay for them.
+# Measure with: python benchmarks/bench_import_time.py
+
 # ---------- Load keys ----------
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
 st.set_page_config(page_title="LinkedIn AI Branding Agent", layout="wide")
 st.title("🤖 LinkedIn Personal Branding AI Agent")
 st.caption("Generate, schedule, and export LinkedIn posts effortlessly with AI. Perfect for building your personal brand, tracking engagement, and planning content—all in one beginner-friendly MVP.")
@@ -43,109 +38,146 @@ if "user" not in st.session_state:
     st.session_state.user = None  # will store logged-in user info
 
 
-# ---------- DB init ----------
-init_db()
+# ---------- Export temp files ----------
+# Bulk PDFs and analytics exports are written to temp files and served from
+# disk. A session replaces its own file on re-export and drops it on logout;
+# files left by sessions that just went away are swept once they are old.
+EXPORT_TMP_PREFIX = "linkedin_ai_export_"
+EXPORT_TMP_MAX_AGE = float(os.getenv("EXPORT_TMP_MAX_AGE", "21600"))  # seconds (6 h)
 
 
-# --------- Utility Functions ---
-def optimize_hashtags(hashtags_str):
-    """Clean, normalize, and optimize hashtags for LinkedIn best practices"""
-    if not hashtags_str:
-        return ""
+def sweep_export_files(max_age=EXPORT_TMP_MAX_AGE):
+    """Delete export temp files older than `max_age` seconds. Returns how many were removed."""
+    import glob
+    import tempfile
+    import time
+
+    removed = 0
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), EXPORT_TMP_PREFIX + "*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass  # already gone (another process swept it)
+    return removed
 
-    # Split by spaces or commas
-    raw_tags = hashtags_str.replace(",", " ").split()
 
-    cleaned = []
-    for tag in raw_tags:
-        tag = tag.strip().lower()  # normalize case
-        if not tag:
-            continue
-        if not tag.startswith("#"):
-            tag = "#" + tag
-        cleaned.append(tag)
+def new_export_file(suffix):
+    """Open a fresh export temp file (caller closes it), sweeping stale ones first."""
+    import tempfile
 
-    # Remove duplicates while keeping order
-    seen = set()
-    unique_tags = []
-    for t in cleaned:
-        if t not in seen:
-            unique_tags.append(t)
-            seen.add(t)
+    sweep_export_files()
+    return tempfile.NamedTemporaryFile(prefix=EXPORT_TMP_PREFIX, suffix=suffix, delete=False)
 
-    # Limit to max 5 hashtags
-    return " ".join(unique_tags[:5])
 
+def drop_export_file(key):
+    """Forget the export stored under session_state[key] and delete its file."""
+    previous = st.session_state.pop(key, None)
+    if previous and os.path.exists(previous[0]):
+        os.remove(previous[0])
+
+
+# ---------- DB init ----------
+@st.cache_resource
+def bootstrap_db():
+    """Run schema migrations once per server process, not on every rerun."""
+    sweep_export_files()  # leftovers from before a restart
+    return init_db()
+
+if not bootstrap_db():
+    bootstrap_db.clear()  # retry on the next rerun instead of caching the failure
 
 
 # ---------- Helpers ----------
-def generate_post(name, role, industry, interests):
-    """Generate LinkedIn post via Gemini, with fallback template."""
-    if not GEMINI_API_KEY:
+def generate_post(name, role, industry, interests, fresh=False):
+    """Generate LinkedIn post via the configured LLM backend, with fallback template.
+
+    Identical profile inputs are served from the generation cache unless `fresh`.
+    """
+    try:
+        # Single structured request for post + hashtags; llm.py drops back to
+        # the old two-call flow only if the JSON can't be parsed.
+        result = get_backend().generate(name, role, industry, interests, fresh=fresh)
+        return result["post"], result["hashtags"]
+    except (CircuitOpenError, RateLimitedError) as e:
+        st.info(f"⏳ AI is busy right now ({e}). Using the template instead.")
         return fallback_post(name, role, industry, interests)
+    except Exception as e:
+        st.error(f"Gemini API failed: {e}")
+        return fallback_post(name, role, industry, interests)
+
+def stream_generate_post(placeholder, name, role, industry, interests, fresh=False):
+    """Render the post into `placeholder` as tokens arrive; hashtags come from the same call.
 
+    Returns (post, hashtags) like generate_post, falling back to the template on errors.
+    """
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = f"""You are an expert LinkedIn content writer.
-Create a concise, engaging LinkedIn post for {name}, a {role} in the {industry} industry.
-Include a friendly tone, one short value takeaway in bullet form, and a soft call-to-action.
-Incorporate interests: {interests}. Keep it under 120 words. No emojis in bullet lines."""
-        resp = model.generate_content(prompt)
-        post_content = resp.text.strip()
-
-        hashtag_prompt = f"Suggest 5 short, relevant LinkedIn hashtags for {industry} and {interests}. Output as space-separated tags."
-        hash_resp = model.generate_content(hashtag_prompt)
-        hashtags = hash_resp.text.strip()
-
-        return post_content, hashtags
+        backend = get_backend()
+        extra = {}
+        with placeholder.container():
+            post_content = st.write_stream(backend.stream(name, role, industry, interests, fresh=fresh, out=extra))
+        # a second request only if the model skipped the hashtag line
+        hashtags = extra.get("hashtags") or backend.hashtags(industry, interests)
+        placeholder.empty()
+        return post_content.strip(), hashtags
+    except (CircuitOpenError, RateLimitedError) as e:
+        placeholder.empty()
+        st.info(f"⏳ AI is busy right now ({e}). Using the template instead.")
+        return fallback_post(name, role, industry, interests)
     except Exception as e:
+        placeholder.empty()
         st.error(f"Gemini API failed: {e}")
         return fallback_post(name, role, industry, interests)
 
-def fallback_post(name, role, industry, interests):
-    """Always works: no API needed."""
-    post = f"""Excited to share a quick update! 👋
-
-I'm {name}, working towards {role} in the {industry} space. Recently I explored topics around {interests}.
-Key learnings:
-• Stay consistent with hands-on practice
-• Share small wins publicly
-• Ask for feedback from the community
-
-If you're also into {industry}, let's connect and learn together! #learning #growth"""
-    hashtags = "#career #learning #coding"
-    return post.strip(), hashtags
-
-def make_pdf_bytes(content, hashtags, schedule_date):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    max_width = width - 100
-    y = 750
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, y, "LinkedIn Post")
-    y -= 30
-
-    c.setFont("Helvetica", 11)
-    wrapped = simpleSplit(content, "Helvetica", 11, max_width)
-    for line in wrapped:
-        if y < 80:
-            c.showPage()
-            y = 750
-            c.setFont("Helvetica", 11)
-        c.drawString(50, y, line)
-        y -= 16
-
-    y -= 10
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawString(50, y, f"Hashtags: {hashtags}")
-    y -= 16
-    c.drawString(50, y, f"Scheduled Date: {schedule_date}")
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+def keyset_pager(key, fetch_page):
+    """Render newer/older controls and return only the rows of the current page.
+
+    `fetch_page(after, page_size)` must return (rows, next_cursor). The stack of
+    cursors lives in session_state so each rerun fetches a single page.
+    """
+    cursors_key = f"{key}_cursors"
+    if cursors_key not in st.session_state:
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+
+    page_size = st.selectbox(
+        "Per page", [10, 20, 50, 100],
+        index=[10, 20, 50, 100].index(PAGE_SIZE) if PAGE_SIZE in [10, 20, 50, 100] else 1,
+        key=f"{key}_page_size",
+        on_change=lambda: st.session_state.update({cursors_key: [None]}),
+    )
+    rows, next_cursor = fetch_page(cursors[-1], page_size)
+
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Newer", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_info:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if st.button("Older ➡️", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    return rows
+
+def load_avatar(user):
+    """Return the user's base64 avatar, re-downloading it only when avatar_version changed."""
+    version = user.get("avatar_version") if user else None
+    if not version:
+        return None
+    cached = st.session_state.get("avatar_cache")
+    if cached and cached[0] == version:
+        return cached[1]
+    result = get_avatar(user["id"], if_none_match=cached[0] if cached else None)
+    if not result:
+        return None
+    if result[1] is None:  # server says our copy is current
+        return cached[1]
+    st.session_state.avatar_cache = result
+    return result[1]
 
 # ---------- Authentication ----------
 # ---------- Authentication ----------
@@ -348,6 +380,8 @@ if "user" in st.session_state and st.session_state.user:
             unsafe_allow_html=True
         )
         if st.button("🚪 Logout", use_container_width=True):
+            drop_export_file("bulk_pdf")
+            drop_export_file("analytics_export")
             del st.session_state.user
             st.rerun()
 
@@ -490,8 +524,6 @@ user_id = st.session_state.user["id"]
 user_data = get_user(user_id)
 
 # --- Gather stats (real only) ---
-from database import get_user_stats  # make sure this exists
-
 stats = get_user_stats(user_id)
 posts_created = stats.get("posts", 0)
 drafts_saved = stats.get("drafts", 0)
@@ -500,9 +532,9 @@ with st.sidebar:
     st.markdown("## 🌟 Profile", unsafe_allow_html=True)
 
     # --- Profile Picture Preview (circular, centered, hover zoom, light glow) ---
-    if user_data and user_data.get("profile_pic"):
+    profile_pic_b64 = load_avatar(user_data)
+    if profile_pic_b64:
         try:
-            profile_pic_b64 = user_data["profile_pic"]
             st.markdown(
                 f"""
                 <style>
@@ -588,6 +620,21 @@ with st.sidebar:
         unsafe_allow_html=True
     )
 
+    # --- AI API health (process-wide limiter / breaker counters) ---
+    with st.expander("🩺 AI API status"):
+        llm_stats = get_llm_stats()
+        st.caption(
+            f"Breaker: **{llm_stats['breaker']}** ({llm_stats['consecutive_failures']} consecutive failure(s))"
+        )
+        st.caption(
+            f"Calls {llm_stats['calls']} · OK {llm_stats['successes']} · failed {llm_stats['failures']} · "
+            f"retries {llm_stats['retries']}"
+        )
+        st.caption(
+            f"Rate-limited {llm_stats['rate_limited']} · short-circuited {llm_stats['short_circuited']} · "
+            f"throttled {llm_stats['throttle_wait']:.1f}s"
+        )
+
     # --- Footer ---
     st.markdown(
         "<p style='text-align:center; font-size:12px; color:#777;'>Made with ❤️ using Streamlit + Gemini AI</p>",
@@ -684,11 +731,12 @@ with tab1:
     colA, colB = st.columns([1,1])
     with colA:
         gen_clicked = st.button("Generate Post", use_container_width=True)
+        fresh = st.checkbox("🔄 Fresh variant (skip cache)", value=False)
+        stream_output = st.checkbox("⚡ Stream while generating", value=True)
     with colB:
         schedule_date = st.date_input("Schedule Date", value=date.today())
 
     # ✅ Always fetch latest profile info from DB
-    from database import get_user
     user = get_user(st.session_state.user["id"])
 
     name = user.get("name", "")
@@ -700,7 +748,10 @@ with tab1:
         if not (name and role and industry and interests):
             st.warning("⚠️ Please fill in your profile (Profile tab) before generating.")
         else:
-            post_content, hashtags = generate_post(name, role, industry, interests)
+            if stream_output:
+                post_content, hashtags = stream_generate_post(st.empty(), name, role, industry, interests, fresh=fresh)
+            else:
+                post_content, hashtags = generate_post(name, role, industry, interests, fresh=fresh)
             st.session_state.generated_post = post_content
             st.session_state.generated_hashtags = hashtags
 
@@ -799,55 +850,224 @@ with tab1:
 # --- Content Calendar --- 
 with tab2:
     st.subheader("Scheduled Posts")
-    posts = get_posts(st.session_state.user["id"])
-
-    if not posts:
-        st.info("No posts yet. Generate one in the first tab.")
-    else:
-        import pandas as pd
 
-        # ✅ Normalize dates before rendering
-        for post in posts:
-            if not post["schedule_date"]:
-                post["schedule_date"] = pd.to_datetime("today").strftime("%Y-%m-%d")
-
-        for post in posts:
-            pid = post["id"]
-            content = post["content"]
-            hashtags = post["hashtags"]
-            sdate = post["schedule_date"]
-            likes = post["likes"]
-            comments = post["comments"]
-
-            with st.container(border=True):
-                st.markdown(f"**Post ID:** {pid}")
-                st.markdown(f"**Scheduled Date:** {sdate}")
-                st.markdown(f"**Hashtags:** {hashtags}")
-                st.write(content)
-
-                # Delete button
-                if st.button("🗑️ Delete Post", key=f"del_{pid}"):
-                    from database import delete_post
-                    if delete_post(pid, st.session_state.user["id"]):
-                        st.success("✅ Post deleted successfully!")
-                        st.rerun()
-                    else:
-                        st.error("❌ Failed to delete post.")
+    with st.expander("🗓️ Plan a batch of posts"):
+        profile = get_user(st.session_state.user["id"])
+        colP1, colP2, colP3 = st.columns(3)
+        with colP1:
+            batch_start = st.date_input("From", value=date.today(), key="batch_start")
+        with colP2:
+            batch_end = st.date_input("To", value=date.today() + timedelta(days=6), key="batch_end")
+        with colP3:
+            cadence = st.selectbox("Cadence", list(CADENCES), key="batch_cadence")
+        batch_dates = plan_dates(batch_start, batch_end, cadence)
+        workers = st.slider("Parallel requests", 1, 8, BATCH_MAX_WORKERS, key="batch_workers")
+        st.caption(f"{len(batch_dates)} post(s) will be generated.")
+
+        if st.button("✨ Generate & Save Batch", key="batch_go", disabled=not batch_dates):
+            if not (profile.get("name") and profile.get("role") and profile.get("industry") and profile.get("interests")):
+                st.warning("⚠️ Please fill in your profile (Profile tab) before generating.")
+            else:
+                with st.spinner(f"Generating {len(batch_dates)} posts..."):
+                    batch_posts, batch_stats = generate_batch(
+                        get_backend(), profile["name"], profile["role"], profile["industry"],
+                        profile["interests"], batch_dates, max_workers=workers,
+                    )
+                saved = add_posts(
+                    st.session_state.user["id"], batch_posts,
+                    profile["role"], profile["industry"], profile["interests"],
+                )
+                st.session_state.batch_report = (saved, batch_stats)
+                st.rerun()
 
-                # Simulated analytics
-                sim_likes = likes if likes else random.randint(35, 180)
-                sim_comments = comments if comments else random.randint(3, 25)
-                st.caption(f"Simulated Analytics → 👍 {sim_likes}   💬 {sim_comments}")
+        if st.session_state.get("batch_report"):
+            saved, batch_stats = st.session_state.batch_report
+            st.success(f"✅ Saved {saved} post(s).")
+            if batch_stats["failures"]:
+                st.warning(
+                    f"⚠️ {batch_stats['failures']} slot(s) could not be generated and were not saved: "
+                    + ", ".join(d.strftime("%Y-%m-%d") for d in batch_stats["failed_dates"])
+                    + ". Try those dates again later."
+                )
+            st.caption(
+                f"⏱️ {batch_stats['elapsed']:.1f}s total · {batch_stats['posts_per_sec']:.2f} posts/sec · "
+                f"{batch_stats['failures']}/{batch_stats['posts']} failed · "
+                f"latency p50 {batch_stats['p50']:.2f}s / p90 {batch_stats['p90']:.2f}s / p99 {batch_stats['p99']:.2f}s"
+            )
+    with st.expander("📚 Export many posts to one PDF"):
+        colE1, colE2, colE3 = st.columns(3)
+        with colE1:
+            export_start = st.date_input("From", value=date.today() - timedelta(days=30), key="bulk_pdf_start")
+        with colE2:
+            export_end = st.date_input("To", value=date.today() + timedelta(days=30), key="bulk_pdf_end")
+        with colE3:
+            export_tag = st.text_input("Hashtag (optional)", key="bulk_pdf_tag")
+
+        if st.button("📄 Build PDF", key="bulk_pdf_go"):
+            uid = st.session_state.user["id"]
+            drop_export_file("bulk_pdf")
+            tmp = new_export_file(".pdf")
+            built = False
+            try:
+                from pdf_export import export_posts_pdf_parallel
+                with tmp, st.spinner("Rendering PDF..."):
+                    pages = export_posts_pdf_parallel(
+                        lambda: iter_posts(uid, export_start, export_end, export_tag.strip() or None,
+                                           columns=("content", "hashtags", "schedule_date")),
+                        tmp,
+                    )
+                st.session_state.bulk_pdf = (tmp.name, pages)
+                built = True
+            except Error as e:
+                print("❌ Error exporting posts to PDF:", e)
+                st.error("❌ Could not read your posts for the PDF. Please try again.")
+            except ImportError as e:
+                st.error(f"❌ PDF export needs an extra package: {e.name}")
+            finally:
+                if not built:
+                    tmp.close()
+                    os.remove(tmp.name)  # never leave a half-written PDF behind
+
+        if st.session_state.get("bulk_pdf") and os.path.exists(st.session_state.bulk_pdf[0]):
+            path, pages = st.session_state.bulk_pdf
+            with open(path, "rb") as fh:
+                st.download_button(
+                    f"⬇️ Download PDF ({pages} pages)", fh,
+                    file_name="linkedin_posts.pdf", mime="application/pdf",
+                    use_container_width=True, key="bulk_pdf_dl",
+                )
 
-                pdf_bytes = make_pdf_bytes(content, hashtags, sdate)
+    calendar_columns = ("content", "hashtags", "schedule_date", "likes", "comments")
+    calendar_prepared = st.session_state.setdefault("pdf_prepared", set())
+
+    def calendar_actions(post):
+        pid = post["id"]
+        colDel, colStats, colPdf = st.columns([1, 2, 1])
+        with colDel:
+            if st.button("🗑️ Delete Post", key=f"del_{pid}"):
+                from database import delete_post
+                if delete_post(pid, st.session_state.user["id"]):
+                    st.success("✅ Post deleted successfully!")
+                    st.rerun()
+                else:
+                    st.error("❌ Failed to delete post.")
+        with colStats:
+            # Simulated analytics
+            sim_likes = post["likes"] if post["likes"] else random.randint(35, 180)
+            sim_comments = post["comments"] if post["comments"] else random.randint(3, 25)
+            st.caption(f"Post #{pid} · Simulated Analytics → 👍 {sim_likes}   💬 {sim_comments}")
+        with colPdf:
+            # PDFs are rendered only after "Prepare PDF", then served from the memo cache
+            if pid in calendar_prepared:
+                from pdf_export import post_pdf
+                from views import day_label
                 st.download_button(
-                    "⬇️ Export this post to PDF",
-                    data=pdf_bytes,
+                    "⬇️ PDF",
+                    data=post_pdf(pid, post["content"], post["hashtags"], day_label(post["schedule_date"])),
                     file_name=f"linkedin_post_{pid}.pdf",
                     mime="application/pdf",
                     use_container_width=True,
                     key=f"dl_{pid}"
                 )
+            elif st.button("📄 Prepare PDF", key=f"prep_{pid}", use_container_width=True):
+                calendar_prepared.add(pid)
+                st.rerun()
+
+    calendar_view = st.radio("View", ["🗓️ Month", "📆 Week", "📋 List"], horizontal=True, key="calendar_view")
+
+    # Posts saved without a schedule_date can't be placed on a day; list them on their own
+    undated_count = count_undated_posts(st.session_state.user["id"])
+    if undated_count:
+        with st.expander(f"📭 No date ({undated_count} post(s))"):
+            undated = keyset_pager(
+                "calendar_undated",
+                lambda after, size: get_undated_posts(st.session_state.user["id"], after, size,
+                                                      columns=calendar_columns),
+            )
+            from views import render_cards
+            render_cards(undated, actions=calendar_actions)
+
+    if calendar_view == "📋 List":
+        reset_calendar = lambda: st.session_state.update({"calendar_cursors": [None]})
+        first_day = get_post_date_range(st.session_state.user["id"])[0]
+        colJ, colT = st.columns(2)
+        with colJ:
+            jump_to = st.date_input("Jump to date", value=first_day if isinstance(first_day, date) else date.today(),
+                                    key="calendar_jump", on_change=reset_calendar)
+        with colT:
+            tag_filter = st.text_input("Filter by hashtag", placeholder="e.g., AI", key="calendar_tag",
+                                       on_change=reset_calendar).strip()
+        # Only the visible page is queried and rendered, in calendar order, grouped by month
+        posts = keyset_pager(
+            "calendar",
+            lambda after, size: get_posts_schedule_page(
+                st.session_state.user["id"], jump_to, after, size,
+                hashtag=tag_filter or None, columns=calendar_columns,
+            ),
+        )
+
+        if not posts:
+            st.info("No posts from this date on. Generate one in the first tab or pick an earlier date.")
+        else:
+            from views import render_cards
+            render_cards(posts, actions=calendar_actions, group_by_month=True)
+
+    else:
+        # --- Calendar grid ---
+        # One GROUP BY over the visible days for the counts; posts are only
+        # fetched for the day the user drills into.
+        from views import calendar_weeks
+
+        anchor = st.session_state.setdefault("calendar_anchor", date.today())
+        month_view = calendar_view == "🗓️ Month"
+        weeks = calendar_weeks(anchor, month_view)
+        step = "month" if month_view else "week"
+
+        colPrev, colTitle, colNext = st.columns([1, 2, 1])
+        with colPrev:
+            if st.button(f"⬅️ Previous {step}", key="calendar_prev", use_container_width=True):
+                st.session_state.calendar_anchor = (weeks[0][0] - timedelta(days=1)) if not month_view \
+                    else (anchor.replace(day=1) - timedelta(days=1))
+                st.rerun()
+        with colTitle:
+            title = anchor.strftime("%B %Y") if month_view else \
+                f"{weeks[0][0].strftime('%d %b')} – {weeks[0][-1].strftime('%d %b %Y')}"
+            st.markdown(f"<h4 style='text-align:center;'>{title}</h4>", unsafe_allow_html=True)
+        with colNext:
+            if st.button(f"Next {step} ➡️", key="calendar_next", use_container_width=True):
+                st.session_state.calendar_anchor = (weeks[-1][-1] + timedelta(days=1)) if not month_view \
+                    else (anchor.replace(day=28) + timedelta(days=4)).replace(day=1)
+                st.rerun()
+
+        counts = get_post_counts_by_day(st.session_state.user["id"], weeks[0][0], weeks[-1][-1])
+
+        for col, name in zip(st.columns(7), ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
+            col.markdown(f"**{name}**")
+        for week in weeks:
+            for col, day in zip(st.columns(7), week):
+                n = counts.get(day, 0)
+                outside = month_view and day.month != anchor.month
+                label = f"{day.day}" + (f" · {n} 📝" if n else "")
+                if col.button(label, key=f"cal_{day.isoformat()}", disabled=outside and not n,
+                              type="primary" if n else "secondary", use_container_width=True):
+                    st.session_state.calendar_day = day
+                    st.session_state.calendar_day_cursors = [None]
+
+        selected = st.session_state.get("calendar_day")
+        if selected and weeks[0][0] <= selected <= weeks[-1][-1]:
+            st.markdown(f"### {selected.strftime('%A, %d %B %Y')}")
+            if counts.get(selected):
+                st.caption(f"{counts[selected]} post(s) scheduled")
+            day_posts = keyset_pager(
+                "calendar_day",
+                lambda after, size: get_posts_between(st.session_state.user["id"], selected, selected,
+                                                      after, size, columns=calendar_columns),
+            )
+            if not day_posts:
+                st.info("Nothing scheduled for this day.")
+            else:
+                from views import render_cards
+                render_cards(day_posts, actions=calendar_actions)
 
 
 # --- Profile Tab ---
@@ -857,15 +1077,16 @@ with tab3:
     st.subheader("Your Profile")
 
     # Get latest user info from DB
-    from database import get_user, update_user, process_profile_pic
+    from database import process_profile_pic
     user = get_user(st.session_state.user["id"])
 
     # Profile picture
     col1, col2 = st.columns([1, 3])
     with col1:
-        if user.get("profile_pic"):
+        profile_pic_b64 = load_avatar(user)
+        if profile_pic_b64:
             st.image(
-                f"data:image/png;base64,{user['profile_pic']}", 
+                f"data:image/png;base64,{profile_pic_b64}", 
                 width=120, 
                 caption="Profile Picture"
             )
@@ -907,30 +1128,32 @@ with tab3:
 with tab4:
     st.subheader("📊 Analytics Dashboard")
 
-    posts = get_posts(st.session_state.user["id"])
-    if not posts:
-        st.info("No posts yet. Generate and save some posts first.")
+    uid = st.session_state.user["id"]
+    first_date, last_date = get_post_date_range(uid)
+    if not first_date:
+        st.info("No dated posts yet. Analytics charts posts by schedule date; generate and schedule some posts first.")
     else:
-        df = pd.DataFrame(posts)
-        df = df[df["content"].notna() & (df["content"].str.strip() != "")]
-        df["schedule_date"] = pd.to_datetime(df["schedule_date"])
+        import pandas as pd
+        from charts import cached_chart, posts_per_month_chart, top_hashtags_chart, word_count_chart, engagement_chart
+        from exports import EXPORT_COLUMNS, EXPORT_FORMATS, export_rows
 
         # --- Filters ---
         st.markdown("### 🔍 Filters")
         colA, colB = st.columns(2)
         with colA:
-            start_date = st.date_input("Start Date", value=df["schedule_date"].min().date())
+            start_date = st.date_input("Start Date", value=first_date)
         with colB:
-            end_date = st.date_input("End Date", value=df["schedule_date"].max().date())
+            end_date = st.date_input("End Date", value=last_date)
         hashtag_filter = st.text_input("Filter by Hashtag (optional)", placeholder="e.g., AI, Python")
+        filters = (uid, start_date, end_date, hashtag_filter.strip() or None)
 
-        # Apply filters
-        mask = (df["schedule_date"].dt.date >= start_date) & (df["schedule_date"].dt.date <= end_date)
-        if hashtag_filter:
-            mask &= df["hashtags"].str.contains(hashtag_filter, case=False, na=False)
-        filtered_df = df[mask]
+        # Aggregates come back from MySQL already grouped (one row per month)
+        monthly = pd.DataFrame(
+            get_monthly_post_stats(*filters),
+            columns=["month", "posts", "avg_likes", "avg_comments"],
+        )
 
-        if filtered_df.empty:
+        if monthly.empty:
             st.warning("⚠️ No posts found for the selected filters.")
             st.stop()
 
@@ -946,136 +1169,116 @@ with tab4:
 
         view_mode = st.radio("Choose View", ["📋 Table View", "📰 Card View"], horizontal=True)
 
-        if view_mode == "📋 Table View":
+        recent_rows = keyset_pager(
+            "recent",
+            lambda after, size: get_posts_page(
+                st.session_state.user["id"], after, size,
+                columns=("content", "hashtags", "schedule_date"),
+            ),
+        )
+        if not recent_rows:
+            st.info("No recent posts to show.")
+
+        elif view_mode == "📋 Table View":
+            recent_df = pd.DataFrame(recent_rows)
+            recent_df["schedule_date"] = pd.to_datetime(recent_df["schedule_date"])
             st.dataframe(
-                df[["schedule_date", "content", "hashtags"]]
-                .sort_values("schedule_date", ascending=False)
+                recent_df[["schedule_date", "content", "hashtags"]]
             )
 
         else:  # --- Card View ---
-            for _, row in df.sort_values("schedule_date", ascending=False).iterrows():
-                with st.container():
-                    st.markdown(
-                        f"""
-                        <div style="border:1px solid #333; border-radius:10px; padding:15px; margin-bottom:15px; background:#111;">
-                            <p style="color:#aaa; margin-bottom:8px;">📅 {row['schedule_date'].strftime('%Y-%m-%d')}</p>
-                            <p style="color:white; font-size:15px;">{row['content']}</p>
-                            <div style="margin-top:10px;">
-                    """,
-                        unsafe_allow_html=True,
-                    )
+            from views import render_cards
+            render_cards(recent_rows)
 
-                    # pill-style hashtags
-                    tags = str(row["hashtags"]).split()
-                    if tags:
-                        tags_html = " ".join(
-                            [f"<span style='background:#1f77b4; color:white; padding:4px 10px; border-radius:15px; margin:3px; display:inline-block; font-size:13px;'> {t} </span>" for t in tags]
-                        )
-                        st.markdown(tags_html, unsafe_allow_html=True)
-
-                    st.markdown("</div></div>", unsafe_allow_html=True)
 
+        # Charts are cached as PNG bytes; any post write bumps the version and
+        # so the key, and nothing is queried or drawn when the key is unchanged
+        chart_key = filters + (get_posts_version(uid),)
+        monthly_rows = list(monthly.itertuples(index=False, name=None))
 
         # --- Posts per Month ---
         st.markdown("### 📅 Posts per Month")
-        posts_per_month = filtered_df.groupby(filtered_df["schedule_date"].dt.to_period("M")).size()
-        fig1, ax1 = plt.subplots(figsize=(7, 4))
-        posts_per_month.plot(kind="bar", ax=ax1, color="#4cc9f0", edgecolor="white")
-        ax1.set_ylabel("Number of Posts", color="white")
-        ax1.set_xlabel("Month", color="white")
-        ax1.set_title("Posting Frequency", fontsize=14, color="white")
-        ax1.tick_params(axis='x', labelcolor="white", rotation=45)
-        ax1.tick_params(axis='y', labelcolor="white")
-        fig1.patch.set_facecolor("#0e1117")
-        ax1.set_facecolor("#0e1117")
-        st.pyplot(fig1)
+        st.image(cached_chart("posts_per_month", chart_key, lambda: posts_per_month_chart(
+            [(month, posts) for month, posts, _, _ in monthly_rows])))
 
         # --- Most Used Hashtags ---
         st.markdown("### 🔖 Most Used Hashtags")
-        all_tags = " ".join(filtered_df["hashtags"].dropna().astype(str)).split()
-        tags_series = pd.Series(all_tags).value_counts().head(10)
-        fig2, ax2 = plt.subplots(figsize=(7, 4))
-        tags_series.plot(kind="bar", ax=ax2, color="#f8961e", edgecolor="white")
-        ax2.set_ylabel("Frequency", color="white")
-        ax2.set_xlabel("Hashtags", color="white")
-        ax2.set_title("Top Hashtags", fontsize=14, color="white")
-        ax2.tick_params(axis='x', labelcolor="white", rotation=45)
-        ax2.tick_params(axis='y', labelcolor="white")
-        fig2.patch.set_facecolor("#0e1117")
-        ax2.set_facecolor("#0e1117")
-        st.pyplot(fig2)
+        st.image(cached_chart("top_hashtags", chart_key, lambda: top_hashtags_chart(
+            get_top_hashtags(*filters, limit=10))))
 
         # --- Post Length Distribution ---
         st.markdown("### ✍️ Post Length (Word Count) Distribution")
-        filtered_df["word_count"] = filtered_df["content"].apply(lambda x: len(str(x).split()))
-        fig3, ax3 = plt.subplots(figsize=(7, 4))
-        filtered_df["word_count"].plot(kind="hist", bins=10, ax=ax3, color="#90be6d", edgecolor="white", alpha=0.9)
-        ax3.set_xlabel("Word Count", color="white")
-        ax3.set_ylabel("Frequency", color="white")
-        ax3.set_title("Post Length Distribution", fontsize=14, color="white")
-        ax3.tick_params(axis='x', labelcolor="white")
-        ax3.tick_params(axis='y', labelcolor="white")
-        fig3.patch.set_facecolor("#0e1117")
-        ax3.set_facecolor("#0e1117")
-        st.pyplot(fig3)
+        st.image(cached_chart("word_count", chart_key, lambda: word_count_chart(
+            get_word_count_distribution(*filters))))
 
         # --- Engagement Analytics (Simulated) ---
         st.markdown("### 📈 Engagement Trend (Simulated)")
-        if "likes" not in filtered_df.columns or "comments" not in filtered_df.columns:
-            import numpy as np
-            np.random.seed(42)
-            filtered_df["likes"] = np.random.randint(10, 100, size=len(filtered_df))
-            filtered_df["comments"] = np.random.randint(2, 20, size=len(filtered_df))
-
-        engagement_df = filtered_df.groupby(filtered_df["schedule_date"].dt.to_period("M"))[["likes", "comments"]].mean()
-        fig4, ax4 = plt.subplots(figsize=(7, 4))
-        engagement_df.plot(ax=ax4, marker="o")
-        ax4.set_title("Average Engagement per Month", fontsize=14, color="white")
-        ax4.set_ylabel("Engagement (Avg Likes/Comments)", color="white")
-        ax4.set_xlabel("Month", color="white")
-        ax4.tick_params(axis='x', labelcolor="white", rotation=45)
-        ax4.tick_params(axis='y', labelcolor="white")
-        ax4.legend(["Likes", "Comments"], facecolor="#0e1117", edgecolor="white", labelcolor="white")
-        fig4.patch.set_facecolor("#0e1117")
-        ax4.set_facecolor("#0e1117")
-        st.pyplot(fig4)
+        st.image(cached_chart("engagement", chart_key, lambda: engagement_chart(
+            [(month, likes, comments) for month, _, likes, comments in monthly_rows])))
 
         st.caption("⚠️ Engagement metrics are simulated for demo purposes. Real data requires LinkedIn API integration.")
 
         # --- Export Options ---
+        # Built only when asked for, streamed from a server-side cursor into a
+        # temp file one batch at a time, then offered for download.
         st.markdown("### 📂 Export Filtered Analytics")
-        csv_data = filtered_df.to_csv(index=False).encode("utf-8")
-        st.download_button("⬇️ Download CSV", csv_data, "linkedin_ai_analytics.csv", "text/csv", use_container_width=True)
-
-        import io
-        output = io.BytesIO()
-        filtered_df.to_excel(output, index=False, sheet_name="Analytics")
-        st.download_button(
-            "⬇️ Download Excel",
-            output.getvalue(),
-            "linkedin_ai_analytics.xlsx",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
-        )
+        colX1, colX2 = st.columns([1, 2])
+        with colX1:
+            export_fmt = st.selectbox("Format", list(EXPORT_FORMATS), key="analytics_export_fmt")
+        with colX2:
+            st.write("")
+            if st.button("📦 Prepare export", key="analytics_export_go", use_container_width=True):
+                drop_export_file("analytics_export")
+                tmp = new_export_file(EXPORT_FORMATS[export_fmt][0])
+                exported = False
+                try:
+                    with tmp, st.spinner(f"Exporting {export_fmt}..."):
+                        rows = export_rows(iter_posts(*filters, columns=EXPORT_COLUMNS), export_fmt, tmp)
+                    st.session_state.analytics_export = (tmp.name, export_fmt, filters, rows)
+                    exported = True
+                except Error as e:
+                    print("❌ Error exporting analytics:", e)
+                    st.error("❌ Could not read your posts for the export. Please try again.")
+                except ImportError as e:
+                    st.error(f"❌ {export_fmt} export needs an extra package: {e.name}")
+                finally:
+                    if not exported:
+                        tmp.close()
+                        os.remove(tmp.name)  # never leave a half-written export behind
+
+        prepared = st.session_state.get("analytics_export")
+        if prepared and prepared[2] == filters and os.path.exists(prepared[0]):
+            path, fmt, _, rows = prepared
+            suffix, mime, _ = EXPORT_FORMATS[fmt]
+            with open(path, "rb") as fh:
+                st.download_button(
+                    f"⬇️ Download {fmt} ({rows} rows)", fh,
+                    file_name=f"linkedin_ai_analytics{suffix}", mime=mime,
+                    use_container_width=True, key="analytics_export_dl",
+                )
 
 # --- Drafts Tab ---
 # --- Drafts Tab ---
 with tab5:
     st.subheader("📝 Drafts")
 
-    from database import get_drafts, delete_draft, add_post
-    from datetime import date
+    from database import publish_draft, publish_drafts, delete_drafts, reschedule_drafts, BULK_BATCH_SIZE
 
-    drafts = get_drafts(st.session_state.user["id"])
+    drafts = keyset_pager(
+        "drafts",
+        lambda after, size: get_drafts_page(st.session_state.user["id"], after, size),
+    )
 
     if not drafts:
         st.info("No drafts yet. Generate and save one as draft.")
     else:
+        import pandas as pd
+
         df_drafts = pd.DataFrame(drafts)
 
         view_mode = st.radio(
             "Choose Drafts View",
-            ["📋 Table View", "📰 Card View"],
+            ["📋 Table View", "📰 Card View", "☑️ Bulk Actions"],
             horizontal=True,
             key="drafts_view"
         )
@@ -1086,86 +1289,114 @@ with tab5:
                 return date.today().strftime("%Y-%m-%d")
             return d.strftime("%Y-%m-%d") if hasattr(d, "strftime") else str(d)
 
+        # --- Bulk Actions ---
+        # Checkboxes live in one data_editor, so ticking rows doesn't rerun
+        # per-row buttons; each action runs as batched IN (...) statements
+        # scoped to the user, BULK_BATCH_SIZE ids per batch.
+        if view_mode == "☑️ Bulk Actions":
+            uid = st.session_state.user["id"]
+            scope = st.radio("Apply to", ["Selected drafts on this page", "All my drafts"],
+                             horizontal=True, key="drafts_bulk_scope")
+
+            if scope == "Selected drafts on this page":
+                select_all = st.checkbox("Select all on this page", key="drafts_select_all")
+                picked = st.data_editor(
+                    df_drafts.assign(
+                        select=select_all,
+                        schedule_date=df_drafts["schedule_date"].map(safe_date),
+                        content=df_drafts["content"].str.slice(0, 80),
+                    )[["select", "schedule_date", "content", "id"]],
+                    column_config={
+                        "select": st.column_config.CheckboxColumn("✔", default=False),
+                        "id": None,  # hidden, used to act on the row
+                    },
+                    disabled=["schedule_date", "content"],
+                    hide_index=True,
+                    use_container_width=True,
+                    key=f"drafts_bulk_editor_{select_all}",
+                )
+                target_ids = [int(i) for i in picked.loc[picked["select"], "id"]]
+            else:
+                target_ids = [int(d["id"]) for d in get_drafts(uid, columns=("id",))]
+            st.caption(f"{len(target_ids)} draft(s) selected")
+
+            colP, colD, colS, colR = st.columns([1, 1, 1, 1])
+            with colS:
+                shift_days = st.number_input("Shift by days", value=7, step=1, key="drafts_shift_days")
+            action = None
+            with colP:
+                if st.button("✅ Publish selected", disabled=not target_ids, use_container_width=True):
+                    action = ("Published", "Publishing", lambda ids: publish_drafts(ids, uid))
+            with colD:
+                if st.button("🗑️ Delete selected", disabled=not target_ids, use_container_width=True):
+                    action = ("Deleted", "Deleting", lambda ids: delete_drafts(ids, uid))
+            with colR:
+                if st.button("📅 Reschedule", disabled=not target_ids, use_container_width=True):
+                    action = ("Rescheduled", "Rescheduling", lambda ids: reschedule_drafts(ids, uid, shift_days))
+
+            if action:
+                import time
+                label, verb, run = action
+                timings = []
+                with st.spinner(f"{verb} {len(target_ids)} draft(s)..."):
+                    for start in range(0, len(target_ids), BULK_BATCH_SIZE):
+                        batch = target_ids[start:start + BULK_BATCH_SIZE]
+                        started = time.perf_counter()
+                        done = run(batch)
+                        timings.append({
+                            "batch": len(timings) + 1, "drafts": len(batch), "affected": done,
+                            "ms": round((time.perf_counter() - started) * 1000, 1),
+                        })
+                st.session_state.drafts_bulk_result = (label, timings)
+                st.session_state.drafts_cursors = [None]
+                st.rerun()
+
+            if st.session_state.get("drafts_bulk_result"):
+                label, timings = st.session_state.pop("drafts_bulk_result")
+                st.success(f"{label} {sum(t['affected'] for t in timings)} draft(s) in {len(timings)} batch(es) ✅")
+                st.dataframe(pd.DataFrame(timings), hide_index=True)
+
         # --- Table View ---
-        if view_mode == "📋 Table View":
-            for _, row in df_drafts.sort_values("schedule_date", ascending=False).iterrows():
+        elif view_mode == "📋 Table View":
+            for row in drafts:
                 col1, col2, col3 = st.columns([4, 1, 1])
                 with col1:
                     st.markdown(f"**📅 {safe_date(row['schedule_date'])}** - {row['content'][:80]}...")
                 with col2:
                     if st.button("✅ Publish", key=f"publish_{row['id']}"):
-                        success = add_post(
-                            st.session_state.user["id"],
-                            row["content"],
-                            row["hashtags"],
-                            safe_date(row["schedule_date"]),
-                            st.session_state.user["role"],
-                            st.session_state.user.get("industry", ""),
-                            st.session_state.user.get("interests", "")
-                        )
+                        success = publish_draft(row["id"], st.session_state.user["id"])
                         if success:
-                            delete_draft(row["id"])
                             st.success("Draft published as a post! ✅")
                             st.rerun()
                         else:
                             st.error("❌ Failed to publish draft. Check logs.")
                 with col3:
                     if st.button("🗑️ Delete", key=f"delete_{row['id']}"):
-                        delete_draft(row["id"])
+                        delete_draft(row["id"], st.session_state.user["id"])
                         st.warning("Draft deleted!")
                         st.rerun()
 
         # --- Card View ---
         else:
-            for _, row in df_drafts.sort_values("schedule_date", ascending=False).iterrows():
-                with st.container():
-                    st.markdown(
-                        f"""
-                        <div style="border:1px solid #333; border-radius:10px; 
-                                   padding:15px; margin-bottom:15px; background:#111;">
-                            <p style="color:#aaa; margin-bottom:8px;">📅 {safe_date(row['schedule_date'])}</p>
-                            <p style="color:white; font-size:15px;">{row['content']}</p>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
+            from views import render_cards
 
-                    tags = str(row["hashtags"]).split()
-                    if tags:
-                        tags_html = " ".join(
-                            [
-                                f"<span style='background:#1f77b4; color:white; padding:4px 10px; "
-                                f"border-radius:15px; margin:3px; display:inline-block; font-size:13px;'> {t} </span>"
-                                for t in tags
-                            ]
-                        )
-                        st.markdown(tags_html, unsafe_allow_html=True)
-
-                    colA, colB = st.columns([1, 1])
-                    with colA:
-                        if st.button("✅ Publish", key=f"publish_card_{row['id']}"):
-                            success = add_post(
-                                st.session_state.user["id"],
-                                row["content"],
-                                row["hashtags"],
-                                safe_date(row["schedule_date"]),
-                                st.session_state.user["role"],
-                                st.session_state.user.get("industry", ""),
-                                st.session_state.user.get("interests", "")
-                            )
-                            if success:
-                                delete_draft(row["id"])
-                                st.success("Draft published as a post! ✅")
-                                st.rerun()
-                            else:
-                                st.error("❌ Failed to publish draft. Check logs.")
-                    with colB:
-                        if st.button("🗑️ Delete", key=f"delete_card_{row['id']}"):
-                            delete_draft(row["id"])
-                            st.warning("Draft deleted!")
+            def draft_actions(row):
+                colA, colB = st.columns([1, 1])
+                with colA:
+                    if st.button("✅ Publish", key=f"publish_card_{row['id']}"):
+                        success = publish_draft(row["id"], st.session_state.user["id"])
+                        if success:
+                            st.success("Draft published as a post! ✅")
                             st.rerun()
+                        else:
+                            st.error("❌ Failed to publish draft. Check logs.")
+                with colB:
+                    if st.button("🗑️ Delete", key=f"delete_card_{row['id']}"):
+                        delete_draft(row["id"], st.session_state.user["id"])
+                        st.warning("Draft deleted!")
+                        st.rerun()
 
-
+            render_cards(drafts, actions=draft_actions)
 
 
 st.divider()
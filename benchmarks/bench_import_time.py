@@ -0,0 +1,111 @@
+# benchmarks/bench_import_time.py
+# Cold-start import cost of the login page, measured with `python -X importtime`.
+# The login path is whatever app.py imports at module level (read from its
+# source, so this stays in sync); heavy libraries must only be imported inside
+# the tabs that use them. Each measurement runs in a fresh interpreter.
+#
+#   python benchmarks/bench_import_time.py                # report, fail over budget
+#   python benchmarks/bench_import_time.py --budget-ms 500
+#   python benchmarks/bench_import_time.py --top 25       # more of the slowest imports
+
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time allowed for app.py's module-level imports. Together
+# with one DB round trip this keeps the login page rendering in under 1.5 s.
+LOGIN_IMPORT_BUDGET_MS = 800
+
+# Must never be pulled in before login (checked on the full import tree).
+HEAVY_MODULES = (
+    "pandas", "matplotlib", "reportlab", "pypdf", "openpyxl", "pyarrow",
+    "google.generativeai", "bcrypt", "pyperclip", "PIL",
+)
+
+
+def login_imports():
+    """Modules app.py imports at module level, i.e. before the login form renders."""
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as fh:
+        tree = ast.parse(fh.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def importtime(modules):
+    """Import `modules` in a fresh interpreter. Returns [(depth, cumulative_us, name)]."""
+    code = "; ".join(f"import {name}" for name in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(cumulative), name.strip()))
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        raise RuntimeError(error)
+    return rows
+
+
+def measured(modules):
+    """importtime(modules) without what the bare interpreter imports at startup (site, encodings)."""
+    startup = {name for _, _, name in importtime([])}
+    return [row for row in importtime(modules) if row[2] not in startup]
+
+
+def main():
+    args = sys.argv[1:]
+    budget_ms = float(args[args.index("--budget-ms") + 1]) if "--budget-ms" in args else LOGIN_IMPORT_BUDGET_MS
+    top = int(args[args.index("--top") + 1]) if "--top" in args else 10
+
+    modules = login_imports()
+    try:
+        rows = measured(modules)
+    except RuntimeError as e:
+        print(f"❌ Could not import the login path ({e}); install requirements.txt first")
+        sys.exit(2)
+
+    total_ms = sum(us for depth, us, _ in rows if depth == 0) / 1000
+    print(f"Login path: {', '.join(modules)}")
+    print(f"Cumulative import time: {total_ms:.0f} ms (budget {budget_ms:.0f} ms)\n")
+    print("Slowest top-level imports:")
+    for depth, us, name in sorted((r for r in rows if r[0] == 0), key=lambda r: -r[1])[:top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    loaded = {name for _, _, name in rows}
+    leaked = sorted(
+        heavy for heavy in HEAVY_MODULES
+        if any(name == heavy or name.startswith(heavy + ".") for name in loaded)
+    )
+
+    print("\nDeferred to the tabs that use them (fresh interpreter each):")
+    for heavy in HEAVY_MODULES:
+        try:
+            cost = sum(us for depth, us, _ in measured([heavy]) if depth == 0) / 1000
+            print(f"  {cost:8.1f} ms  {heavy}")
+        except RuntimeError:
+            print(f"  {'-':>8}     {heavy} (not installed)")
+
+    if leaked:
+        print(f"\n❌ Heavy modules imported before login: {', '.join(leaked)}")
+        sys.exit(1)
+    if total_ms > budget_ms:
+        print(f"\n❌ Login imports take {total_ms:.0f} ms, over the {budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print("\n✅ Login path within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_pdf_export.py
+# Pages/sec and peak RSS of the bulk PDF exporter on synthetic posts.
+# Each size runs in a fresh subprocess so peak RSS is not shared between runs.
+#
+#   python benchmarks/bench_pdf_export.py            # 1k and 10k posts
+#   python benchmarks/bench_pdf_export.py 500 2000   # custom sizes
+#   PDF_WORKERS=4 python benchmarks/bench_pdf_export.py --parallel   # process-pool renderer
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BODY = (
+    "Excited to share a quick update! Consistency beats intensity when you are learning in public. "
+    "Key learnings: stay consistent with hands-on practice, share small wins publicly, and ask for "
+    "feedback from the community. "
+)
+
+
+def synthetic_posts(count):
+    start = date(2024, 1, 1)
+    for i in range(count):
+        yield {
+            "content": BODY * (1 + i % 6),  # mix of one- and two-page posts
+            "hashtags": "#learning #growth #career",
+            "schedule_date": start + timedelta(days=i % 365),
+        }
+
+
+def run_one(count, parallel=False):
+    from pdf_export import export_posts_pdf, export_posts_pdf_parallel
+
+    export = export_posts_pdf_parallel if parallel else export_posts_pdf
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        started = time.perf_counter()
+        pages = export(lambda: synthetic_posts(count), tmp.name)
+        elapsed = time.perf_counter() - started
+        size_mb = os.path.getsize(tmp.name) / 1e6
+    # parent only; with --parallel, workers' RSS is reported separately below
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    if parallel:
+        child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        print(f"        largest worker peak RSS {child_kb / 1024:7.1f} MiB")
+    print(f"{count:>6} posts  {pages:>6} pages  {elapsed:7.2f}s  "
+          f"{pages / elapsed:8.1f} pages/s  peak RSS {peak_kb / 1024:7.1f} MiB  file {size_mb:6.1f} MB")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    parallel = "--parallel" in args
+    args = [a for a in args if a != "--parallel"]
+    if len(args) == 2 and args[0] == "--one":
+        run_one(int(args[1]), parallel)
+    else:
+        for count in [int(a) for a in args] or [1000, 10000]:
+            cmd = [sys.executable, __file__, "--one", str(count)] + (["--parallel"] if parallel else [])
+            subprocess.run(cmd, check=True)
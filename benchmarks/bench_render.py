@@ -0,0 +1,80 @@
+# benchmarks/bench_render.py
+# Script-run time and element count of the post list, rendering every post
+# (the old Calendar/Card views) vs. one page of views.render_cards, on
+# synthetic posts. Uses Streamlit's AppTest, so no browser or database is needed.
+#
+#   python benchmarks/bench_render.py                 # 100, 500 and 2000 posts
+#   python benchmarks/bench_render.py 50 5000         # custom sizes
+#   PAGE_SIZE=50 python benchmarks/bench_render.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+
+
+def render_script():
+    # Runs inside AppTest; settings arrive through session_state.
+    from datetime import date, timedelta
+
+    import streamlit as st
+    from views import render_cards
+
+    count = st.session_state.bench_posts
+    posts = [
+        {
+            "id": i,
+            "content": "Consistency beats intensity when you are learning in public. " * 4,
+            "hashtags": "#learning #growth #career",
+            "schedule_date": date(2024, 1, 1) + timedelta(days=i // 3),
+            "likes": 0,
+            "comments": 0,
+        }
+        for i in range(count)
+    ]
+
+    def actions(post):
+        col1, col2 = st.columns(2)
+        col1.button("🗑️ Delete Post", key=f"del_{post['id']}")
+        col2.button("📄 Prepare PDF", key=f"prep_{post['id']}")
+
+    if st.session_state.bench_mode == "all":
+        render_cards(posts, actions=actions)
+    else:
+        render_cards(posts[:st.session_state.bench_page_size], actions=actions, group_by_month=True)
+
+
+def run_one(count, mode, repeats=3):
+    from streamlit.testing.v1 import AppTest
+
+    best = None
+    for _ in range(repeats):
+        at = AppTest.from_function(render_script, default_timeout=600)
+        at.session_state.bench_posts = count
+        at.session_state.bench_mode = mode
+        at.session_state.bench_page_size = PAGE_SIZE
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        best = elapsed if best is None else min(best, elapsed)
+    elements = len(at.markdown) + len(at.button)
+    return best, elements
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 500, 2000]
+    print(f"{'posts':>7}  {'mode':<12} {'run (ms)':>9}  {'elements':>8}")
+    for count in sizes:
+        for mode in ("all", "paged"):
+            elapsed, elements = run_one(count, mode)
+            label = "all rows" if mode == "all" else f"page of {PAGE_SIZE}"
+            print(f"{count:>7}  {label:<12} {elapsed * 1000:>9.1f}  {elements:>8}")
+
+
+if __name__ == "__main__":
+    main()
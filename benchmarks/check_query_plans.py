@@ -0,0 +1,252 @@
+# benchmarks/check_query_plans.py
+# Query-plan regression check. Seeds a throwaway MySQL database, calls every
+# hot read in database.py while recording the SELECTs it sends, then EXPLAINs
+# each one and fails if a base table is fully scanned or sorted with a
+# filesort. Uses DB_CONFIG's server and credentials; the database name comes
+# from PLAN_CHECK_DB and is dropped afterwards unless --keep is given.
+#
+#   python benchmarks/check_query_plans.py
+#   python benchmarks/check_query_plans.py --users 20 --posts 2000 --keep
+
+import os
+import random
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+
+import database
+
+PLAN_CHECK_DB = os.getenv("PLAN_CHECK_DB", "linkedin_ai_plancheck")
+
+# Aggregates that sort their grouped result (one row per month / word count /
+# tag) may filesort that small temporary table; their base-table access is
+# still checked for full scans.
+FILESORT_OK = {"get_monthly_post_stats", "get_word_count_distribution", "get_top_hashtags"}
+
+TAGS = ["#ai", "#python", "#career", "#growth", "#learning", "#data", "#cloud", "#leadership"]
+
+
+# ---------- Seeding ----------
+def _server_execute(*statements):
+    """Run statements on the server named in DB_CONFIG, outside any database."""
+    config = {k: v for k, v in database.DB_CONFIG.items() if k != "database"}
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    for sql in statements:
+        cursor.execute(sql)
+    cursor.close()
+    conn.close()
+
+
+def create_database():
+    _server_execute(f"DROP DATABASE IF EXISTS `{PLAN_CHECK_DB}`", f"CREATE DATABASE `{PLAN_CHECK_DB}`")
+
+
+def drop_database():
+    _server_execute(f"DROP DATABASE IF EXISTS `{PLAN_CHECK_DB}`")
+
+
+def seed(users, posts_per_user, drafts_per_user):
+    """Fill users/posts/drafts with spread-out dates so indexes are worth using."""
+    rng = random.Random(42)
+    start = date(2023, 1, 1)
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO users (name, email, password, role, industry, interests) VALUES (%s, %s, %s, %s, %s, %s)",
+            [(f"User {i}", f"user{i}@example.com", "x", "Engineer", "Tech", "AI, Python") for i in range(users)],
+        )
+        cursor.execute("SELECT id FROM users")
+        user_ids = [row[0] for row in cursor.fetchall()]
+
+        for uid in user_ids:
+            rows = []
+            for i in range(posts_per_user):
+                tags = " ".join(rng.sample(TAGS, 3))
+                words = " ".join(["insight"] * rng.randint(20, 120))
+                rows.append((uid, words, tags, start + timedelta(days=rng.randint(0, 900)),
+                             "Engineer", "Tech", "AI", rng.randint(0, 200), rng.randint(0, 30)))
+            cursor.executemany(
+                """
+                INSERT INTO posts (user_id, content, hashtags, schedule_date, role, industry, interests, likes, comments)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                rows,
+            )
+            cursor.executemany(
+                "INSERT INTO drafts (user_id, content, hashtags, schedule_date) VALUES (%s, %s, %s, %s)",
+                [(uid, "draft " * 30, " ".join(rng.sample(TAGS, 2)), start + timedelta(days=rng.randint(0, 900)))
+                 for _ in range(drafts_per_user)],
+            )
+        conn.commit()
+        cursor.close()
+
+    database.backfill_post_hashtags()
+    database.rebuild_user_stats()
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("ANALYZE TABLE users, posts, drafts, post_hashtags, user_stats")
+        cursor.fetchall()
+        cursor.close()
+    return user_ids
+
+
+# ---------- Recording ----------
+class _RecordingCursor:
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+
+    def execute(self, operation, params=()):
+        if operation.lstrip().upper().startswith("SELECT"):
+            self._log.append((operation, tuple(params or ())))
+        return self._cursor.execute(operation, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _RecordingConnection:
+    def __init__(self, conn, log):
+        self._conn = conn
+        self._log = log
+
+    def cursor(self, *args, **kwargs):
+        return _RecordingCursor(self._conn.cursor(*args, **kwargs), self._log)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def record(fn, *args, **kwargs):
+    """Run fn and return the SELECT statements (sql, params) it executed."""
+    log = []
+    real = database.get_connection
+
+    @contextmanager
+    def recording():
+        with real() as conn:
+            yield _RecordingConnection(conn, log)
+
+    database.get_connection = recording
+    try:
+        result = fn(*args, **kwargs)
+        if hasattr(result, "__next__"):
+            list(result)  # generators only query when consumed
+    finally:
+        database.get_connection = real
+    return log
+
+
+def explain(sql, params):
+    with database.get_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("EXPLAIN " + sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def problems(name, plan):
+    found = []
+    for row in plan:
+        table = row.get("table") or ""
+        if table.startswith("<"):  # derived/union/subquery result, not a base table
+            continue
+        if row.get("type") == "ALL":
+            found.append(f"full scan of {table}")
+        if "Using filesort" in (row.get("Extra") or "") and name not in FILESORT_OK:
+            found.append(f"filesort on {table}")
+    return found
+
+
+# ---------- Hot queries ----------
+def hot_queries(uid):
+    """(name, fn, args, kwargs) for every read the UI issues per page view."""
+    first = date(2023, 6, 1)
+    last = date(2024, 6, 1)
+    _, posts_cursor = database.get_posts_page(uid)
+    _, drafts_cursor = database.get_drafts_page(uid)
+    _, schedule_cursor = database.get_posts_schedule_page(uid, first)
+    _, tag_cursor = database.get_posts_by_tag(uid, "ai")
+    return [
+        ("get_user", database.get_user, (uid,), {}),
+        ("get_user_stats", database.get_user_stats, (uid,), {}),
+        ("get_posts_version", database.get_posts_version, (uid,), {}),
+        ("get_posts", database.get_posts, (uid,), {}),
+        ("get_posts_page", database.get_posts_page, (uid,), {}),
+        ("get_posts_page (next)", database.get_posts_page, (uid, posts_cursor), {}),
+        ("get_drafts", database.get_drafts, (uid,), {}),
+        ("get_drafts_page", database.get_drafts_page, (uid,), {}),
+        ("get_drafts_page (next)", database.get_drafts_page, (uid, drafts_cursor), {}),
+        ("get_posts_schedule_page", database.get_posts_schedule_page, (uid, first), {}),
+        ("get_posts_schedule_page (next)", database.get_posts_schedule_page, (uid, first, schedule_cursor), {}),
+        ("get_posts_by_tag", database.get_posts_by_tag, (uid, "ai"), {}),
+        ("get_posts_by_tag (next)", database.get_posts_by_tag, (uid, "ai", tag_cursor), {}),
+        ("get_post_counts_by_day", database.get_post_counts_by_day, (uid, first, first + timedelta(days=41)), {}),
+        ("get_posts_between", database.get_posts_between, (uid, first, first), {}),
+        ("get_undated_posts", database.get_undated_posts, (uid,), {}),
+        ("count_undated_posts", database.count_undated_posts, (uid,), {}),
+        ("iter_posts", database.iter_posts, (uid, first, last), {}),
+        ("iter_posts (hashtag)", database.iter_posts, (uid, first, last, "python"), {}),
+        ("get_post_date_range", database.get_post_date_range, (uid,), {}),
+        ("get_monthly_post_stats", database.get_monthly_post_stats, (uid, first, last), {}),
+        ("get_word_count_distribution", database.get_word_count_distribution, (uid, first, last), {}),
+        ("get_top_hashtags", database.get_top_hashtags, (uid, first, last), {}),
+        ("get_top_hashtags (hashtag)", database.get_top_hashtags, (uid, first, last, "data"), {}),
+    ]
+
+
+def check(users=10, posts=2000, drafts=300, keep=False):
+    """Seed PLAN_CHECK_DB, EXPLAIN every hot read and print the plans.
+
+    Returns the number of queries that fell back to a full scan or filesort.
+    """
+    database.DB_CONFIG["database"] = PLAN_CHECK_DB
+    database.CACHE_TTL = 0  # every call must reach MySQL
+    create_database()
+    try:
+        if not database.init_db():
+            raise RuntimeError(f"Could not initialise {PLAN_CHECK_DB}")
+        user_ids = seed(users, posts, drafts)
+        print(f"Seeded {len(user_ids)} users × {posts} posts / {drafts} drafts into {PLAN_CHECK_DB}\n")
+
+        failures = 0
+        for name, fn, fn_args, fn_kwargs in hot_queries(user_ids[len(user_ids) // 2]):
+            base = name.split(" ")[0]
+            for sql, params in record(fn, *fn_args, **fn_kwargs):
+                plan = explain(sql, params)
+                issues = problems(base, plan)
+                failures += bool(issues)
+                access = ", ".join(f"{r['table']}:{r['type']}/{r['key'] or '-'}" for r in plan)
+                status = "❌ " + "; ".join(issues) if issues else "✅"
+                print(f"{status:<3} {name:<32} {access}")
+        return failures
+    finally:
+        if not keep:
+            drop_database()
+
+
+def main():
+    args = sys.argv[1:]
+    users = int(args[args.index("--users") + 1]) if "--users" in args else 10
+    posts = int(args[args.index("--posts") + 1]) if "--posts" in args else 2000
+    drafts = int(args[args.index("--drafts") + 1]) if "--drafts" in args else 300
+
+    try:
+        failures = check(users, posts, drafts, keep="--keep" in args)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    if failures:
+        print(f"\n❌ {failures} hot quer{'y' if failures == 1 else 'ies'} fell back to a full scan or filesort")
+        sys.exit(1)
+    print("\n✅ All hot queries use an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# charts.py
+# Analytics tab charts rendered to PNG bytes and memoized per
+# (chart, user, filters, posts version). Figures are built with the
+# object-oriented Figure API rather than pyplot, so nothing is registered in
+# pyplot's global figure manager and each figure is freed with its last
+# reference instead of piling up across reruns.
+
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from matplotlib.figure import Figure
+
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CHART_DPI = int(os.getenv("CHART_DPI", "100"))
+
+BACKGROUND = "#0e1117"
+
+_chart_cache = OrderedDict()  # (name, key) -> png bytes
+_chart_cache_bytes = 0
+_chart_cache_lock = threading.Lock()
+_chart_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _style(fig, ax, title, xlabel, ylabel, rotation=0):
+    ax.set_title(title, fontsize=14, color="white")
+    ax.set_xlabel(xlabel, color="white")
+    ax.set_ylabel(ylabel, color="white")
+    ax.tick_params(axis="x", labelcolor="white", rotation=rotation)
+    ax.tick_params(axis="y", labelcolor="white")
+    fig.patch.set_facecolor(BACKGROUND)
+    ax.set_facecolor(BACKGROUND)
+
+
+def _png(fig):
+    buffer = BytesIO()
+    try:
+        fig.savefig(buffer, format="png", dpi=CHART_DPI, facecolor=fig.get_facecolor())
+    finally:
+        fig.clear()
+    return buffer.getvalue()
+
+
+def posts_per_month_chart(monthly):
+    """monthly: [(month, posts)]"""
+    fig = Figure(figsize=(7, 4))
+    ax = fig.subplots()
+    ax.bar([m for m, _ in monthly], [n for _, n in monthly], color="#4cc9f0", edgecolor="white")
+    _style(fig, ax, "Posting Frequency", "Month", "Number of Posts", rotation=45)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def top_hashtags_chart(top_tags):
+    """top_tags: [(tag, uses)] most used first"""
+    fig = Figure(figsize=(7, 4))
+    ax = fig.subplots()
+    if top_tags:
+        ax.bar([t for t, _ in top_tags], [n for _, n in top_tags], color="#f8961e", edgecolor="white")
+    _style(fig, ax, "Top Hashtags", "Hashtags", "Frequency", rotation=45)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def word_count_chart(word_counts):
+    """word_counts: [(word_count, posts)]"""
+    fig = Figure(figsize=(7, 4))
+    ax = fig.subplots()
+    ax.hist(
+        [wc for wc, _ in word_counts], bins=10, weights=[n for _, n in word_counts],
+        color="#90be6d", edgecolor="white", alpha=0.9,
+    )
+    _style(fig, ax, "Post Length Distribution", "Word Count", "Frequency")
+    fig.tight_layout()
+    return _png(fig)
+
+
+def engagement_chart(monthly):
+    """monthly: [(month, avg_likes, avg_comments)]"""
+    fig = Figure(figsize=(7, 4))
+    ax = fig.subplots()
+    months = [m for m, _, _ in monthly]
+    ax.plot(months, [float(l or 0) for _, l, _ in monthly], marker="o")
+    ax.plot(months, [float(c or 0) for _, _, c in monthly], marker="o")
+    _style(fig, ax, "Average Engagement per Month", "Month", "Engagement (Avg Likes/Comments)", rotation=45)
+    ax.legend(["Likes", "Comments"], facecolor=BACKGROUND, edgecolor="white", labelcolor="white")
+    fig.tight_layout()
+    return _png(fig)
+
+
+def cached_chart(name, key, render):
+    """Return PNG bytes for chart `name`, calling render() only on a miss.
+
+    `key` must capture everything the chart depends on (user, filters and the
+    user's posts version), so a write produces a new key rather than a stale
+    image. Old entries are evicted least-recently-used first once the cache
+    holds more than CHART_CACHE_MAX_BYTES.
+    """
+    global _chart_cache_bytes
+    cache_key = (name, key)
+    with _chart_cache_lock:
+        if cache_key in _chart_cache:
+            _chart_cache.move_to_end(cache_key)
+            _chart_stats["hits"] += 1
+            return _chart_cache[cache_key]
+        _chart_stats["misses"] += 1
+
+    png = render()
+    with _chart_cache_lock:
+        if cache_key not in _chart_cache:
+            _chart_cache[cache_key] = png
+            _chart_cache_bytes += len(png)
+        while _chart_cache_bytes > CHART_CACHE_MAX_BYTES and len(_chart_cache) > 1:
+            _, old = _chart_cache.popitem(last=False)
+            _chart_cache_bytes -= len(old)
+            _chart_stats["evictions"] += 1
+    return png
+
+
+def get_chart_cache_stats():
+    """Hit/miss/eviction counters plus current size of the chart cache."""
+    with _chart_cache_lock:
+        return dict(_chart_stats, entries=len(_chart_cache), bytes=_chart_cache_bytes)
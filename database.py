@@ -1,19 +1,27 @@
 
 # database.py
 
-import mysql.connector
-from mysql.connector import Error
-from werkzeug.security import generate_password_hash, check_password_hash
 import base64
-from PIL import Image, ImageOps, ImageDraw
-import io
-
+import copy
+import functools
+import hashlib
 import io
-import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
+from werkzeug.security import generate_password_hash, check_password_hash
+from hashtags import normalize_hashtags
 
 # ---------- Helper for Profile Picture ----------
 def process_profile_pic(uploaded_file):
     """Convert uploaded image to circular avatar, resize, and return as base64 string."""
+    from PIL import Image, ImageOps, ImageDraw  # only needed on upload; keeps Pillow off the login path
+
     img = Image.open(uploaded_file).convert("RGBA")
 
     # Resize to max 200x200 to keep DB small
@@ -45,65 +53,410 @@ DB_CONFIG = {
     "database": "linkedin_ai"           # 🔑 Your database name
 }
 
-# ---------- Init DB ----------
-# ---------- Init DB ----------
-def init_db():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+# ---------- Connection Pool ----------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))                  # max open connections per process
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))         # seconds to wait for a free connection
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))  # re-check idle connections after N seconds
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_SIZE)
+_last_ping = {}  # connection_id -> last time it was known healthy
+
+POOL_STATS = {
+    "checkouts": 0,      # total successful checkouts
+    "waits": 0,          # checkouts that had to wait for a free connection
+    "timeouts": 0,       # checkouts that gave up after DB_POOL_TIMEOUT
+    "reconnects": 0,     # stale connections revived by the health check
+    "in_use": 0,
+    "peak_in_use": 0,
+}
 
-        # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                role VARCHAR(50) DEFAULT 'member',
-                industry VARCHAR(100),
-                interests TEXT,
-                profile_pic LONGTEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
 
-        # Posts table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS posts (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT,
-                role VARCHAR(100),
-                industry VARCHAR(100),
-                interests TEXT,
-                content TEXT,
-                hashtags TEXT,
-                schedule_date DATE,
-                likes INT DEFAULT 0,
-                comments INT DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+def _bump(key, n=1):
+    with _stats_lock:
+        POOL_STATS[key] += n
+        POOL_STATS["peak_in_use"] = max(POOL_STATS["peak_in_use"], POOL_STATS["in_use"])
+
+
+def _get_pool():
+    """Create the process-wide pool on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name="linkedin_ai",
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **DB_CONFIG,
+                )
+    return _pool
+
+
+def _health_check(conn):
+    """Ping connections that sat idle in the pool, reconnecting if the server dropped them."""
+    cid = conn.connection_id
+    now = time.monotonic()
+    if now - _last_ping.get(cid, 0) < DB_POOL_PING_INTERVAL:
+        return
+    try:
+        conn.ping(reconnect=False)
+    except Error:
+        conn.reconnect(attempts=2, delay=0)
+        _bump("reconnects")
+        cid = conn.connection_id
+    _last_ping[cid] = now
+
+
+@contextmanager
+def get_connection():
+    """Check out a pooled connection for several queries; it goes back to the pool on exit.
+
+    Uncommitted work is rolled back if the block raises. Raises PoolError
+    (a mysql.connector Error) if no connection frees up within DB_POOL_TIMEOUT.
+    """
+    pool = _get_pool()
+    if not _pool_slots.acquire(blocking=False):
+        _bump("waits")
+        if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+            _bump("timeouts")
+            raise PoolError(
+                f"No MySQL connection available after {DB_POOL_TIMEOUT}s (pool size {DB_POOL_SIZE})"
             )
-        """)
 
+    conn = None
+    try:
+        conn = pool.get_connection()
+        _health_check(conn)
+        _bump("checkouts")
+        _bump("in_use")
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Error:
+                pass
+            raise
+        finally:
+            _bump("in_use", -1)
+    finally:
+        if conn is not None:
+            conn.close()  # returns the connection to the pool
+        _pool_slots.release()
+
+
+def get_pool_stats():
+    """Snapshot of pool counters for monitoring."""
+    with _stats_lock:
+        return dict(POOL_STATS, size=DB_POOL_SIZE)
+
+
+# ---------- Schema Migrations ----------
+# Each entry is (version, description, steps). A step is either a SQL string
+# or a callable taking a cursor (for data backfills). Append new versions at
+# the end; never edit one that has already shipped.
+#
+# MySQL DDL commits implicitly, so a migration that fails halfway is re-run
+# from its first step with part of it already applied. Steps must therefore be
+# idempotent: CREATE TABLE IF NOT EXISTS, INSERT IGNORE, and _add_column /
+# _create_index for ALTERs, which check information_schema first.
+def _add_column(table, column, definition):
+    def step(cursor):
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+            (table, column),
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def _create_index(table, name, columns):
+    def step(cursor):
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+            (table, name),
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+    return step
+
+
+MIGRATIONS = [
+    (1, "base tables", [
+        # Users table
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role VARCHAR(50) DEFAULT 'member',
+            industry VARCHAR(100),
+            interests TEXT,
+            profile_pic LONGTEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Posts table
+        """
+        CREATE TABLE IF NOT EXISTS posts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            role VARCHAR(100),
+            industry VARCHAR(100),
+            interests TEXT,
+            content TEXT,
+            hashtags TEXT,
+            schedule_date DATE,
+            likes INT DEFAULT 0,
+            comments INT DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
         # ✅ Drafts table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS drafts (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT,
-                content TEXT,
-                hashtags TEXT,
-                schedule_date DATE DEFAULT (CURRENT_DATE),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
+        """
+        CREATE TABLE IF NOT EXISTS drafts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            content TEXT,
+            hashtags TEXT,
+            schedule_date DATE DEFAULT (CURRENT_DATE),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+    ]),
+    (2, "user_stats rollup", [
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INT PRIMARY KEY,
+            posts INT NOT NULL DEFAULT 0,
+            drafts INT NOT NULL DEFAULT 0,
+            likes BIGINT NOT NULL DEFAULT 0,
+            comments BIGINT NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        lambda cursor: _rebuild_user_stats(cursor),
+    ]),
+    (3, "move profile pictures to user_avatars", [
+        """
+        CREATE TABLE IF NOT EXISTS user_avatars (
+            user_id INT PRIMARY KEY,
+            version CHAR(64) NOT NULL,
+            image LONGTEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        _add_column("users", "avatar_version", "CHAR(64) NULL"),
+        """
+        INSERT IGNORE INTO user_avatars (user_id, version, image)
+        SELECT id, SHA2(profile_pic, 256), profile_pic FROM users
+        WHERE profile_pic IS NOT NULL AND profile_pic <> ''
+        """,
+        """
+        UPDATE users SET avatar_version = SHA2(profile_pic, 256), profile_pic = NULL
+        WHERE profile_pic IS NOT NULL AND profile_pic <> ''
+        """,
+    ]),
+    (4, "generation cache", [
+        """
+        CREATE TABLE IF NOT EXISTS generation_cache (
+            cache_key CHAR(64) PRIMARY KEY,
+            model VARCHAR(100),
+            response MEDIUMTEXT NOT NULL,
+            hits INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_generation_cache_last_used (last_used_at)
+        )
+        """,
+    ]),
+    (5, "normalized post_hashtags", [
+        """
+        CREATE TABLE IF NOT EXISTS post_hashtags (
+            post_id INT NOT NULL,
+            user_id INT NOT NULL,
+            tag VARCHAR(100) NOT NULL,
+            PRIMARY KEY (post_id, tag),
+            INDEX idx_post_hashtags_user_tag (user_id, tag),
+            FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE
+        )
+        """,
+        lambda cursor: _backfill_post_hashtags(cursor),
+    ]),
+    (6, "posts data version", [
+        _add_column("user_stats", "posts_version", "INT NOT NULL DEFAULT 0"),
+    ]),
+    (7, "posts calendar index", [
+        _create_index("posts", "idx_posts_user_schedule", "user_id, schedule_date"),
+    ]),
+    # InnoDB appends the primary key to secondary indexes, so these also serve
+    # the keyset ORDER BY created_at DESC, id DESC without a filesort.
+    (8, "posts/drafts composite indexes", [
+        _create_index("posts", "idx_posts_user_created", "user_id, created_at"),
+        _create_index("drafts", "idx_drafts_user_created", "user_id, created_at"),
+        _create_index("drafts", "idx_drafts_user_schedule", "user_id, schedule_date"),
+    ]),
+]
+
+_schema_ready = False
+
+
+def get_schema_version(cursor):
+    """Highest applied migration version (0 on a fresh database)."""
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def migrate_db():
+    """Apply pending migrations in order. Returns the list of versions applied.
+
+    A MySQL named lock keeps several app processes from migrating at once.
+    """
+    applied = []
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK('linkedin_ai_migrate', 30)")
+        if cursor.fetchone()[0] != 1:
+            raise Error("Timed out waiting for the schema migration lock")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255),
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            current = get_schema_version(cursor)
+            for version, description, steps in MIGRATIONS:
+                if version <= current:
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (version, description),
+                )
+                conn.commit()
+                applied.append(version)
+                print(f"✅ Applied migration {version}: {description}")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('linkedin_ai_migrate')")
+            cursor.fetchall()
+            cursor.close()
+    return applied
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+
+# ---------- Init DB ----------
+def init_db(force=False):
+    """Bring the schema up to date once per process (pass force=True to re-check)."""
+    global _schema_ready
+    if _schema_ready and not force:
+        return True
+    try:
+        if migrate_db():
+            invalidate_user_cache()
+        _schema_ready = True
         print("✅ Database initialized successfully")
+        return True
     except Error as e:
         print("❌ Error initializing database:", e)
+        return False
+
+
+# ---------- Read Cache ----------
+# Read-through cache for per-user reads (profile, posts, drafts, stats). Entries
+# are keyed by user so every writer can drop exactly that user's entries; TTL
+# and LRU size bound memory no matter how many sessions are open.
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))                 # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+
+_cache = OrderedDict()   # key -> (expires_at, value)
+_cache_keys_by_user = {}  # user_id -> set of keys
+_cache_generation = {}    # user_id -> invalidation count; None counts clear-all
+_cache_lock = threading.Lock()
+CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+
+def _cache_drop(key):
+    """Remove one entry (caller holds _cache_lock)."""
+    _cache.pop(key, None)
+    keys = _cache_keys_by_user.get(key[1])
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _cache_keys_by_user[key[1]]
+
+
+def _generation(user_id):
+    """Invalidations seen so far for user_id (caller holds _cache_lock)."""
+    return (_cache_generation.get(None, 0), _cache_generation.get(user_id, 0))
+
+
+def read_through(name, cacheable=bool):
+    """Cache a `fn(user_id, ...)` reader. Results failing `cacheable` (e.g. empty
+    results returned after a DB error) are not stored."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(user_id, *args, **kwargs):
+            key = (name, user_id, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with _cache_lock:
+                entry = _cache.get(key)
+                if entry and entry[0] > now:
+                    _cache.move_to_end(key)
+                    CACHE_STATS["hits"] += 1
+                    return copy.deepcopy(entry[1])
+                CACHE_STATS["misses"] += 1
+                generation = _generation(user_id)
+
+            value = fn(user_id, *args, **kwargs)
+            if CACHE_TTL <= 0 or not cacheable(value):
+                return value
+
+            with _cache_lock:
+                if _generation(user_id) != generation:
+                    # a write invalidated this user while we were reading; the
+                    # value may predate it, so don't put it back
+                    return value
+                _cache[key] = (now + CACHE_TTL, copy.deepcopy(value))
+                _cache.move_to_end(key)
+                _cache_keys_by_user.setdefault(user_id, set()).add(key)
+                while len(_cache) > CACHE_MAX_ENTRIES:
+                    _cache_drop(next(iter(_cache)))
+                    CACHE_STATS["evictions"] += 1
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidate_user_cache(user_id=None):
+    """Drop cached reads for one user, or everything if user_id is None."""
+    with _cache_lock:
+        CACHE_STATS["invalidations"] += 1
+        _cache_generation[user_id] = _cache_generation.get(user_id, 0) + 1
+        if user_id is None:
+            _cache.clear()
+            _cache_keys_by_user.clear()
+            return
+        for key in list(_cache_keys_by_user.get(user_id, ())):
+            _cache_drop(key)
+
+
+def get_cache_stats():
+    with _cache_lock:
+        return dict(CACHE_STATS, entries=len(_cache), max_entries=CACHE_MAX_ENTRIES)
 
 
 # ---------- User Management ----------
@@ -151,28 +504,26 @@ def init_db():
 def register_user(name, email, password, role="member"):
     """Register a new user with hashed password. Returns True on success, False if email exists or error."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-
-        # ✅ Check if email already exists
-        cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-        if cursor.fetchone():
-            print(f"⚠️ Email '{email}' already registered.")
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            # ✅ Check if email already exists
+            cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
+            if cursor.fetchone():
+                print(f"⚠️ Email '{email}' already registered.")
+                cursor.close()
+                return False
+
+            # Hash password
+            hashed_pw = generate_password_hash(password)
+
+            # Insert user
+            cursor.execute(
+                "INSERT INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, %s)",
+                (name, email, hashed_pw, role),
+            )
+            conn.commit()
             cursor.close()
-            conn.close()
-            return False
-
-        # Hash password
-        hashed_pw = generate_password_hash(password)
-
-        # Insert user
-        cursor.execute(
-            "INSERT INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, %s)",
-            (name, email, hashed_pw, role),
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
         return True
     except Error as e:
         print("❌ Error registering user:", e)
@@ -182,16 +533,18 @@ def register_user(name, email, password, role="member"):
 def login_user(email, password):
     """Login a user by checking hashed password. Returns user dict or None."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT {', '.join(USER_COLUMNS)}, password_hash FROM users WHERE email = %s",
+                (email,),
+            )
+            user = cursor.fetchone()
+            cursor.close()
 
         # Check hashed password
-        if user and check_password_hash(user["password_hash"], password):
-            return user  # dict with id, name, email, role, etc.
+        if user and check_password_hash(user.pop("password_hash"), password):
+            return user  # dict with id, name, email, role, avatar_version, etc.
         return None
     except Error as e:
         print("❌ Error logging in:", e)
@@ -213,6 +566,53 @@ def login_user(email, password):
 
 
 
+# ---------- Pagination ----------
+# Explicit column lists instead of SELECT * so callers only pull what they render.
+POST_COLUMNS = ("id", "user_id", "role", "industry", "interests", "content", "hashtags",
+                "schedule_date", "likes", "comments", "created_at")
+DRAFT_COLUMNS = ("id", "user_id", "content", "hashtags", "schedule_date", "created_at")
+_TABLE_COLUMNS = {"posts": POST_COLUMNS, "drafts": DRAFT_COLUMNS}
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "200"))  # ids per IN (...) in bulk draft actions
+
+
+def _select_list(table, columns):
+    """Validate requested columns against the table whitelist and build the SELECT list."""
+    unknown = set(columns) - set(_TABLE_COLUMNS[table])
+    if unknown:
+        raise ValueError(f"Unknown {table} columns: {sorted(unknown)}")
+    # id and created_at are always needed for the keyset cursor
+    cols = list(dict.fromkeys(["id", "created_at", *columns]))
+    return ", ".join(cols)
+
+
+def _get_page(table, user_id, after, page_size, columns):
+    """Keyset pagination on (created_at, id) DESC.
+
+    `after` is the (created_at, id) of the last row of the previous page, or
+    None for the first page. Fetches one extra row to know whether more exist.
+    """
+    sql = f"SELECT {_select_list(table, columns)} FROM {table} WHERE user_id = %s"
+    params = [user_id]
+    if after is not None:
+        sql += " AND (created_at < %s OR (created_at = %s AND id < %s))"
+        params += [after[0], after[0], after[1]]
+    sql += " ORDER BY created_at DESC, id DESC LIMIT %s"
+    params.append(page_size + 1)
+
+    with get_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, tuple(params))
+        rows = cursor.fetchall()
+        cursor.close()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
+
+
 # ---------- Posts ----------
 def add_post(user_id, content, hashtags, schedule_date, role, industry, interests):
     """Insert a new post into DB (skip if content is blank)."""
@@ -222,18 +622,20 @@ def add_post(user_id, content, hashtags, schedule_date, role, industry, interest
             print("⚠️ Empty post skipped (not saved).")
             return False
 
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+        with get_connection() as conn:
+            cursor = conn.cursor()
 
-        sql = """
-        INSERT INTO posts (user_id, content, hashtags, schedule_date, role, industry, interests)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        cursor.execute(sql, (user_id, content, hashtags, schedule_date, role, industry, interests))
-        conn.commit()
+            sql = """
+            INSERT INTO posts (user_id, content, hashtags, schedule_date, role, industry, interests)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(sql, (user_id, content, hashtags, schedule_date, role, industry, interests))
+            _save_post_hashtags(cursor, [(cursor.lastrowid, user_id, hashtags)])
+            _bump_user_stats(cursor, user_id, posts=1)
+            conn.commit()
 
-        cursor.close()
-        conn.close()
+            cursor.close()
+        invalidate_user_cache(user_id)
         return True
     except Error as e:
         print("❌ Error inserting post:", e)
@@ -241,29 +643,382 @@ def add_post(user_id, content, hashtags, schedule_date, role, industry, interest
 
 
 
-def get_posts(user_id):
+@read_through("posts")
+def get_posts(user_id, columns=POST_COLUMNS):
+    """Fetch all posts for a user (newest first). Prefer get_posts_page for UI lists."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM posts WHERE user_id = %s ORDER BY created_at DESC", (user_id,))
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT {_select_list('posts', columns)} FROM posts "
+                "WHERE user_id = %s ORDER BY created_at DESC, id DESC",
+                (user_id,),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
         return rows
     except Error as e:
         print("❌ Error fetching posts:", e)
         return []
+
+
+@read_through("posts_page", cacheable=lambda page: bool(page[0]))
+def get_posts_page(user_id, after=None, page_size=PAGE_SIZE, columns=POST_COLUMNS):
+    """One page of posts, newest first. Returns (rows, next_cursor); next_cursor is None on the last page."""
+    try:
+        return _get_page("posts", user_id, after, page_size, columns)
+    except Error as e:
+        print("❌ Error fetching posts page:", e)
+        return [], None
     
+def add_posts(user_id, posts, role, industry, interests):
+    """Bulk-insert posts (dicts with content, hashtags, schedule_date) in one transaction.
+
+    Blank posts are skipped. Returns the number of posts saved (0 on error).
+    """
+    rows = [
+        (user_id, p["content"], p["hashtags"], str(p["schedule_date"]), role, industry, interests)
+        for p in posts
+        if p.get("content") and p["content"].strip()
+    ]
+    if not rows:
+        return 0
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # row-at-a-time inside one transaction: each lastrowid is needed for
+            # post_hashtags, and multi-row INSERT ids aren't guaranteed consecutive
+            tagged = []
+            for row in rows:
+                cursor.execute(
+                    """
+                    INSERT INTO posts (user_id, content, hashtags, schedule_date, role, industry, interests)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    row,
+                )
+                tagged.append((cursor.lastrowid, user_id, row[2]))
+            _save_post_hashtags(cursor, tagged)
+            _bump_user_stats(cursor, user_id, posts=len(rows))
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache(user_id)
+        return len(rows)
+    except Error as e:
+        print("❌ Error inserting posts:", e)
+        return 0
+
+# ---------- Hashtags ----------
+# post_hashtags holds one row per (post, normalized tag), kept in step by the
+# post writers, so tag filters and top-N counts are index lookups instead of
+# string scans over every post.
+def _tag_filter(user_id, hashtag):
+    """WHERE clauses + params matching posts that carry every tag in `hashtag`.
+
+    Each term is a case-insensitive substring of some tag, like the old
+    str.contains filter: "ai" finds #ai and #genai, "#ai" finds #ai and
+    #aiart. Blank filters (including a bare "#") add no clause.
+    """
+    terms = []
+    for term in (hashtag or "").replace(",", " ").lower().split():
+        if term.strip("#") and term not in terms:
+            terms.append(term)
+    clauses, params = [], []
+    for term in terms:
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        clauses.append("id IN (SELECT ph.post_id FROM post_hashtags ph WHERE ph.user_id = %s AND ph.tag LIKE %s)")
+        params += [user_id, f"%{escaped}%"]
+    return clauses, params
+
+
+def _save_post_hashtags(cursor, posts):
+    """Index tags for [(post_id, user_id, hashtags_str)] inside the caller's transaction."""
+    rows = [
+        (post_id, user_id, tag[:100])
+        for post_id, user_id, hashtags in posts
+        for tag in normalize_hashtags(hashtags)
+    ]
+    if rows:
+        cursor.executemany(
+            "INSERT IGNORE INTO post_hashtags (post_id, user_id, tag) VALUES (%s, %s, %s)", rows
+        )
+
+
+def _backfill_post_hashtags(cursor, batch_size=1000):
+    """Index tags for every post that has none yet, in id order. Returns posts processed."""
+    last_id, done, users = 0, 0, set()
+    while True:
+        cursor.execute(
+            """
+            SELECT p.id, p.user_id, p.hashtags FROM posts p
+            WHERE p.id > %s AND p.user_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM post_hashtags ph WHERE ph.post_id = p.id)
+            ORDER BY p.id LIMIT %s
+            """,
+            (last_id, batch_size),
+        )
+        batch = cursor.fetchall()
+        if not batch:
+            break
+        _save_post_hashtags(cursor, batch)
+        last_id = batch[-1][0]
+        done += len(batch)
+        users.update(user_id for _, user_id, _ in batch)
+    if users and get_schema_version(cursor) >= 6:
+        # new tags change the top-hashtags chart; force a re-render
+        cursor.executemany(
+            "UPDATE user_stats SET posts_version = posts_version + 1 WHERE user_id = %s",
+            [(user_id,) for user_id in sorted(users)],
+        )
+    return done
+
+
+def backfill_post_hashtags():
+    """Backfill post_hashtags for existing posts (safe to re-run). Returns posts processed, or None on error."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            done = _backfill_post_hashtags(cursor)
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache()
+        return done
+    except Error as e:
+        print("❌ Error backfilling hashtags:", e)
+        return None
+
+
+def get_posts_by_tag(user_id, tag, after=None, page_size=PAGE_SIZE, columns=POST_COLUMNS):
+    """One keyset page of a user's posts carrying every tag in `tag` (substring match), newest first."""
+    try:
+        clauses, params = _tag_filter(user_id, tag)
+        sql = f"SELECT {_select_list('posts', columns)} FROM posts WHERE " + " AND ".join(["user_id = %s"] + clauses)
+        params = [user_id] + params
+        if after is not None:
+            sql += " AND (created_at < %s OR (created_at = %s AND id < %s))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY created_at DESC, id DESC LIMIT %s"
+        params.append(page_size + 1)
+
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, tuple(params))
+            rows = cursor.fetchall()
+            cursor.close()
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+        return rows, next_cursor
+    except Error as e:
+        print("❌ Error fetching posts by tag:", e)
+        return [], None
+
+
+def _post_filters(user_id, start_date=None, end_date=None, hashtag=None):
+    """WHERE clause + params shared by the filtered post queries."""
+    where = ["user_id = %s"]
+    params = [user_id]
+    if start_date is not None:
+        where.append("schedule_date >= %s")
+        params.append(start_date)
+    if end_date is not None:
+        where.append("schedule_date <= %s")
+        params.append(end_date)
+    # each tag term is looked up through idx_post_hashtags_user_tag
+    clauses, tag_params = _tag_filter(user_id, hashtag)
+    where += clauses
+    params += tag_params
+    return " AND ".join(where), params
+
+
+def iter_posts(user_id, start_date=None, end_date=None, hashtag=None,
+               columns=POST_COLUMNS, batch_size=500):
+    """Stream a user's posts in schedule_date order, `batch_size` rows at a time.
+
+    Uses an unbuffered (server-side) cursor so exports never hold the full
+    result set in memory. The pooled connection is held until the generator
+    is exhausted or closed.
+    """
+    where, params = _post_filters(user_id, start_date, end_date, hashtag)
+    with get_connection() as conn:
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(
+                f"SELECT {_select_list('posts', columns)} FROM posts WHERE {where} "
+                "ORDER BY schedule_date, id",
+                tuple(params),
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            if conn.unread_result:
+                conn.consume_results()  # abandoned mid-stream; drain before returning to the pool
+            cursor.close()
+
+
+@read_through("schedule_page", cacheable=lambda page: bool(page[0]))
+def get_posts_schedule_page(user_id, start_date=None, after=None, page_size=PAGE_SIZE,
+                            hashtag=None, columns=POST_COLUMNS):
+    """One page of posts in calendar order (schedule_date, id) from `start_date` on.
+
+    Keyset-paginated like _get_page; `after` is the (schedule_date, id) of the
+    previous page's last row. Posts without a schedule_date are left out (see
+    get_undated_posts). Returns (rows, next_cursor).
+    """
+    try:
+        where, params = _post_filters(user_id, start_date, None, hashtag)
+        where += " AND schedule_date IS NOT NULL"
+        if after is not None:
+            where += " AND (schedule_date > %s OR (schedule_date = %s AND id > %s))"
+            params += [after[0], after[0], after[1]]
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"SELECT {_select_list('posts', tuple(columns) + ('schedule_date',))} FROM posts "
+                f"WHERE {where} ORDER BY schedule_date, id LIMIT %s",
+                tuple(params) + (page_size + 1,),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1]["schedule_date"], rows[-1]["id"])
+        return rows, next_cursor
+    except Error as e:
+        print("❌ Error fetching calendar page:", e)
+        return [], None
+
+# ---------- Calendar ----------
+# The calendar grid only asks for the days on screen; both queries are range
+# scans on idx_posts_user_schedule, so cost follows posts in view, not history.
+def get_post_counts_by_day(user_id, start_date, end_date):
+    """{date: number of posts} for days between start_date and end_date (inclusive) that have posts."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT schedule_date, COUNT(*) FROM posts
+                WHERE user_id = %s AND schedule_date BETWEEN %s AND %s
+                GROUP BY schedule_date
+                """,
+                (user_id, start_date, end_date),
+            )
+            counts = dict(cursor.fetchall())
+            cursor.close()
+        return counts
+    except Error as e:
+        print("❌ Error fetching calendar counts:", e)
+        return {}
+
+
+def get_posts_between(user_id, start_date, end_date, after=None, page_size=PAGE_SIZE, columns=POST_COLUMNS):
+    """One page of a user's posts scheduled between start_date and end_date (inclusive), in calendar order.
+
+    Keyset-paginated on (schedule_date, id) like get_posts_schedule_page.
+    Returns (rows, next_cursor).
+    """
+    try:
+        sql = (
+            f"SELECT {_select_list('posts', tuple(columns) + ('schedule_date',))} FROM posts "
+            "WHERE user_id = %s AND schedule_date BETWEEN %s AND %s"
+        )
+        params = [user_id, start_date, end_date]
+        if after is not None:
+            sql += " AND (schedule_date > %s OR (schedule_date = %s AND id > %s))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY schedule_date, id LIMIT %s"
+        params.append(page_size + 1)
+
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, tuple(params))
+            rows = cursor.fetchall()
+            cursor.close()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1]["schedule_date"], rows[-1]["id"])
+        return rows, next_cursor
+    except Error as e:
+        print("❌ Error fetching posts for range:", e)
+        return [], None
+
+
+def count_undated_posts(user_id):
+    """Number of a user's posts with no schedule_date."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM posts WHERE user_id = %s AND schedule_date IS NULL", (user_id,)
+            )
+            (count,) = cursor.fetchone()
+            cursor.close()
+        return count
+    except Error as e:
+        print("❌ Error counting undated posts:", e)
+        return 0
+
+
+def get_undated_posts(user_id, after=None, page_size=PAGE_SIZE, columns=POST_COLUMNS):
+    """One page of a user's posts with no schedule_date (legacy rows), oldest first.
+
+    The range queries above can't place them on a day, so the calendar lists
+    them in their own "No date" bucket. `after` is the previous page's last
+    id. Returns (rows, next_cursor).
+    """
+    try:
+        sql = (
+            f"SELECT {_select_list('posts', columns)} FROM posts "
+            "WHERE user_id = %s AND schedule_date IS NULL"
+        )
+        params = [user_id]
+        if after is not None:
+            sql += " AND id > %s"
+            params.append(after)
+        sql += " ORDER BY id LIMIT %s"
+        params.append(page_size + 1)
+
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, tuple(params))
+            rows = cursor.fetchall()
+            cursor.close()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = rows[-1]["id"]
+        return rows, next_cursor
+    except Error as e:
+        print("❌ Error fetching undated posts:", e)
+        return [], None
+
 # -----delete function
 def delete_post(post_id, user_id):
     """Delete a post by its ID (only if it belongs to the user)."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM posts WHERE id = %s AND user_id = %s", (post_id, user_id))
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT likes, comments FROM posts WHERE id = %s AND user_id = %s FOR UPDATE",
+                (post_id, user_id),
+            )
+            row = cursor.fetchone()
+            if row:
+                cursor.execute("DELETE FROM posts WHERE id = %s AND user_id = %s", (post_id, user_id))
+                _bump_user_stats(cursor, user_id, posts=-1, likes=-(row[0] or 0), comments=-(row[1] or 0))
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache(user_id)
         return True
     except Error as e:
         print("❌ Error deleting post:", e)
@@ -272,27 +1027,50 @@ def delete_post(post_id, user_id):
 #---------Profile---------------------------------
 # ---------- User Profile Management ----------
 
+# Lightweight profile columns; the avatar lives in user_avatars and is fetched
+# separately via get_avatar() only when avatar_version changes.
+USER_COLUMNS = ("id", "name", "email", "role", "industry", "interests", "avatar_version", "created_at")
+
+
+@read_through("user")
 def get_user(user_id):
-    """Fetch a single user by ID"""
+    """Fetch a single user by ID (without the profile picture)"""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"SELECT {', '.join(USER_COLUMNS)} FROM users WHERE id = %s", (user_id,))
+            user = cursor.fetchone()
+            cursor.close()
         return user
     except Error as e:
         print("❌ Error fetching user:", e)
         return None
 
 
+def get_avatar(user_id, if_none_match=None):
+    """Fetch a user's avatar as (version, base64_png), ETag style.
+
+    If `if_none_match` equals the stored version the image is not sent and
+    (version, None) is returned. Returns None if the user has no avatar.
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT version, IF(version = %s, NULL, image) FROM user_avatars WHERE user_id = %s",
+                (if_none_match, user_id),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+        return (row[0], row[1]) if row else None
+    except Error as e:
+        print("❌ Error fetching avatar:", e)
+        return None
+
+
 def update_user(user_id, name=None, role=None, industry=None, interests=None, profile_pic=None): 
     """Update user fields dynamically, ensuring no NULL values are stored"""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-
         fields, values = [], []
 
         if name is not None:
@@ -308,17 +1086,28 @@ def update_user(user_id, name=None, role=None, industry=None, interests=None, pr
             fields.append("interests = %s")
             values.append(interests or "") 
         if profile_pic is not None:
-            fields.append("profile_pic = %s")
-            values.append(profile_pic)
+            avatar_version = hashlib.sha256(profile_pic.encode("utf-8")).hexdigest()
+            fields.append("avatar_version = %s")
+            values.append(avatar_version)
 
         if fields:
-            sql = f"UPDATE users SET {', '.join(fields)} WHERE id = %s"
-            values.append(user_id)
-            cursor.execute(sql, tuple(values))
-            conn.commit()
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                if profile_pic is not None:
+                    cursor.execute(
+                        """
+                        INSERT INTO user_avatars (user_id, version, image) VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE version = VALUES(version), image = VALUES(image)
+                        """,
+                        (user_id, avatar_version, profile_pic),
+                    )
+                sql = f"UPDATE users SET {', '.join(fields)} WHERE id = %s"
+                values.append(user_id)
+                cursor.execute(sql, tuple(values))
+                conn.commit()
+                cursor.close()
+            invalidate_user_cache(user_id)
 
-        cursor.close()
-        conn.close()
         return True
     except Error as e:
         print("❌ Error updating user:", e)
@@ -329,91 +1118,455 @@ def update_user(user_id, name=None, role=None, industry=None, interests=None, pr
 def add_draft(user_id, content, hashtags, schedule_date=None):
     """Save a draft post with safe default date."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-
         # ✅ Ensure schedule_date is not None
         if not schedule_date or schedule_date in ["", None, "None"]:
             from datetime import date
             schedule_date = date.today().strftime("%Y-%m-%d")
 
-        cursor.execute(
-            """
-            INSERT INTO drafts (user_id, content, hashtags, schedule_date)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (user_id, content, hashtags, schedule_date),
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO drafts (user_id, content, hashtags, schedule_date)
+                VALUES (%s, %s, %s, %s)
+                """,
+                (user_id, content, hashtags, schedule_date),
+            )
+            _bump_user_stats(cursor, user_id, drafts=1)
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache(user_id)
         return True
     except Error as e:
         print("❌ Error inserting draft:", e)
         return False
 
-def get_drafts(user_id):
+@read_through("drafts")
+def get_drafts(user_id, columns=DRAFT_COLUMNS):
     """Fetch all drafts for a given user"""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT * FROM drafts WHERE user_id = %s ORDER BY created_at DESC", (user_id,))
-        drafts = cursor.fetchall()
+            cursor.execute(
+                f"SELECT {_select_list('drafts', columns)} FROM drafts "
+                "WHERE user_id = %s ORDER BY created_at DESC, id DESC",
+                (user_id,),
+            )
+            drafts = cursor.fetchall()
 
-        cursor.close()
-        conn.close()
+            cursor.close()
         return drafts
     except Error as e:
         print("❌ Error fetching drafts:", e)
         return []
+
+
+@read_through("drafts_page", cacheable=lambda page: bool(page[0]))
+def get_drafts_page(user_id, after=None, page_size=PAGE_SIZE, columns=DRAFT_COLUMNS):
+    """One page of drafts, newest first. Returns (rows, next_cursor)."""
+    try:
+        return _get_page("drafts", user_id, after, page_size, columns)
+    except Error as e:
+        print("❌ Error fetching drafts page:", e)
+        return [], None
     
-def delete_draft(draft_id):
+def delete_drafts(draft_ids, user_id):
+    """Delete the listed drafts owned by `user_id` in one statement. Returns the number deleted."""
+    draft_ids = [int(i) for i in draft_ids]
+    if not draft_ids:
+        return 0
+    marks = ", ".join(["%s"] * len(draft_ids))
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM drafts WHERE id = %s", (draft_id,))
-        conn.commit()
-        print(f"🗑️ Draft {draft_id} deleted")
-        cursor.close()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"DELETE FROM drafts WHERE user_id = %s AND id IN ({marks})", (user_id, *draft_ids))
+            deleted = cursor.rowcount
+            if deleted:
+                _bump_user_stats(cursor, user_id, drafts=-deleted)
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache(user_id)
+        return deleted
+    except Error as e:
+        print("❌ Error deleting drafts:", e)
+        return 0
+
+
+def delete_draft(draft_id, user_id):
+    """Delete a draft by its ID (only if it belongs to the user)."""
+    return delete_drafts([draft_id], user_id) == 1
+
+
+def reschedule_drafts(draft_ids, user_id, days):
+    """Shift schedule_date of the listed drafts by `days` (negative moves earlier). Returns rows updated."""
+    draft_ids = [int(i) for i in draft_ids]
+    if not draft_ids:
+        return 0
+    marks = ", ".join(["%s"] * len(draft_ids))
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                UPDATE drafts SET schedule_date = DATE_ADD(COALESCE(schedule_date, CURRENT_DATE), INTERVAL %s DAY)
+                WHERE user_id = %s AND id IN ({marks})
+                """,
+                (int(days), user_id, *draft_ids),
+            )
+            updated = cursor.rowcount
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache(user_id)
+        return updated
+    except Error as e:
+        print("❌ Error rescheduling drafts:", e)
+        return 0
+
+
+def publish_drafts(draft_ids, user_id):
+    """Move drafts into posts server-side, in one transaction. Returns the number published.
+
+    The statement count is fixed whatever len(draft_ids) is: lock the drafts,
+    INSERT ... SELECT them (role/industry/interests from the user's profile),
+    index their hashtags, DELETE them and bump the counters. Only drafts owned
+    by `user_id` are touched; a crash leaves either the drafts or the posts,
+    never both.
+    """
+    draft_ids = [int(i) for i in draft_ids]
+    if not draft_ids:
+        return 0
+    marks = ", ".join(["%s"] * len(draft_ids))
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT id FROM drafts WHERE user_id = %s AND id IN ({marks}) FOR UPDATE",
+                (user_id, *draft_ids),
+            )
+            owned = [row[0] for row in cursor.fetchall()]
+            if not owned:
+                conn.commit()
+                cursor.close()
+                return 0
+            marks = ", ".join(["%s"] * len(owned))
+
+            cursor.execute(
+                f"""
+                INSERT INTO posts (user_id, content, hashtags, schedule_date, role, industry, interests)
+                SELECT d.user_id, d.content, d.hashtags, COALESCE(d.schedule_date, CURRENT_DATE),
+                       u.role, u.industry, u.interests
+                FROM drafts d JOIN users u ON u.id = d.user_id
+                WHERE d.user_id = %s AND d.id IN ({marks})
+                ORDER BY d.id
+                """,
+                (user_id, *owned),
+            )
+            # ids from one INSERT ... SELECT start at lastrowid but may not be
+            # contiguous, so re-read this user's rows from there; indexing an
+            # extra post twice is harmless (INSERT IGNORE)
+            cursor.execute(
+                "SELECT id, user_id, hashtags FROM posts WHERE user_id = %s AND id >= %s",
+                (user_id, cursor.lastrowid),
+            )
+            _save_post_hashtags(cursor, cursor.fetchall())
+
+            cursor.execute(f"DELETE FROM drafts WHERE user_id = %s AND id IN ({marks})", (user_id, *owned))
+            _bump_user_stats(cursor, user_id, posts=len(owned), drafts=-len(owned))
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache(user_id)
+        return len(owned)
+    except Error as e:
+        print("❌ Error publishing drafts:", e)
+        return 0
+
+
+def publish_draft(draft_id, user_id):
+    """Publish one draft as a post (see publish_drafts). Returns True if it was published."""
+    return publish_drafts([draft_id], user_id) == 1
+
+# ----------Side Bar Analytics ----------
+# user_stats is a per-user rollup kept in step with posts/drafts by the writers
+# above, so the sidebar reads one row instead of scanning both tables.
+def _bump_user_stats(cursor, user_id, posts=0, drafts=0, likes=0, comments=0):
+    """Adjust a user's counters inside the caller's transaction.
+
+    Any change to posts also bumps posts_version, which derived data such as
+    the Analytics charts use as a cache key.
+    """
+    changed = int(bool(posts or likes or comments))
+    cursor.execute(
+        """
+        INSERT INTO user_stats (user_id, posts, drafts, likes, comments, posts_version)
+        VALUES (%s, GREATEST(%s, 0), GREATEST(%s, 0), GREATEST(%s, 0), GREATEST(%s, 0), %s)
+        ON DUPLICATE KEY UPDATE
+            posts = GREATEST(posts + %s, 0),
+            drafts = GREATEST(drafts + %s, 0),
+            likes = GREATEST(likes + %s, 0),
+            comments = GREATEST(comments + %s, 0),
+            posts_version = posts_version + %s
+        """,
+        (user_id, posts, drafts, likes, comments, changed, posts, drafts, likes, comments, changed),
+    )
+
+
+def _rebuild_user_stats(cursor, user_id=None):
+    """Recompute counters from posts/drafts for one user (or everyone)."""
+    sql = """
+        INSERT INTO user_stats (user_id, posts, drafts, likes, comments)
+        SELECT u.id,
+               (SELECT COUNT(*) FROM posts p WHERE p.user_id = u.id),
+               (SELECT COUNT(*) FROM drafts d WHERE d.user_id = u.id),
+               (SELECT COALESCE(SUM(p.likes), 0) FROM posts p WHERE p.user_id = u.id),
+               (SELECT COALESCE(SUM(p.comments), 0) FROM posts p WHERE p.user_id = u.id)
+        FROM users u
+    """
+    params = ()
+    if user_id is not None:
+        sql += " WHERE u.id = %s"
+        params = (user_id,)
+    sql += """
+        ON DUPLICATE KEY UPDATE
+            posts = VALUES(posts), drafts = VALUES(drafts),
+            likes = VALUES(likes), comments = VALUES(comments)
+    """
+    cursor.execute(sql, params)
+    if get_schema_version(cursor) >= 6:
+        # reconciled counters may change what charts show; force a re-render
+        sql = "UPDATE user_stats SET posts_version = posts_version + 1"
+        cursor.execute(sql + (" WHERE user_id = %s" if user_id is not None else ""),
+                       (user_id,) if user_id is not None else ())
+
+
+def rebuild_user_stats(user_id=None):
+    """Reconcile the user_stats rollup with the real tables. Returns True on success."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            _rebuild_user_stats(cursor, user_id)
+            conn.commit()
+            cursor.close()
+        invalidate_user_cache(user_id)
         return True
-    except Exception as e:
-        print("❌ Error deleting draft:", e)
+    except Error as e:
+        print("❌ Error rebuilding user stats:", e)
         return False
 
-# ----------Side Bar Analytics ----------
+
+@read_through("stats", cacheable=lambda stats: any(stats.values()))
 def get_user_stats(user_id):
     """Return total posts, total drafts, and engagement (likes, comments) for a user."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                "SELECT posts, drafts, likes, comments FROM user_stats WHERE user_id = %s",
+                (user_id,),
+            )
+            row = cursor.fetchone()
+            cursor.close()
 
-        # 🔹 Total posts
-        cursor.execute("SELECT COUNT(*) AS total_posts FROM posts WHERE user_id = %s", (user_id,))
-        total_posts = cursor.fetchone()["total_posts"]
+        if not row:
+            return {"posts": 0, "drafts": 0, "likes": 0, "comments": 0}
+        return {
+            "posts": row["posts"],
+            "drafts": row["drafts"],
+            "likes": row["likes"],
+            "comments": row["comments"],
+        }
+    except Error as e:
+        print("❌ Error fetching user stats:", e)
+        return {"posts": 0, "drafts": 0, "likes": 0, "comments": 0}
 
-        # 🔹 Total drafts
-        cursor.execute("SELECT COUNT(*) AS total_drafts FROM drafts WHERE user_id = %s", (user_id,))
-        total_drafts = cursor.fetchone()["total_drafts"]
 
-        # 🔹 Total likes & comments across all posts
-        cursor.execute("""
-            SELECT COALESCE(SUM(likes), 0) AS total_likes,
-                   COALESCE(SUM(comments), 0) AS total_comments
-            FROM posts WHERE user_id = %s
-        """, (user_id,))
-        engagement = cursor.fetchone()
+@read_through("posts_version")
+def get_posts_version(user_id):
+    """Counter bumped on every write to a user's posts (0 if they have none yet)."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT posts_version FROM user_stats WHERE user_id = %s", (user_id,))
+            row = cursor.fetchone()
+            cursor.close()
+        return row[0] if row else 0
+    except Error as e:
+        print("❌ Error fetching posts version:", e)
+        return None
 
-        cursor.close()
-        conn.close()
 
-        return {
-            "posts": total_posts,
-            "drafts": total_drafts,
-            "likes": engagement["total_likes"],
-            "comments": engagement["total_comments"],
-        }
+# ---------- Analytics ----------
+# Aggregates for the Analytics tab, computed in MySQL so the app only receives
+# small result sets (one row per month / word count / tag) however many posts exist.
+def _analytics_filters(user_id, start_date, end_date, hashtag):
+    where, params = _post_filters(user_id, start_date, end_date, hashtag)
+    return where + " AND content IS NOT NULL AND TRIM(content) <> ''", params
+
+
+def get_post_date_range(user_id):
+    """(first, last) schedule_date among the posts the Analytics aggregates count, or (None, None).
+
+    Undated and blank posts are skipped, as they are by the aggregates below.
+    """
+    where, params = _analytics_filters(user_id, None, None, None)
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT MIN(schedule_date), MAX(schedule_date) FROM posts WHERE {where}",
+                tuple(params),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+        return row if row else (None, None)
     except Error as e:
-        print("❌ Error fetching user stats:", e)
-        return {"posts": 0, "drafts": 0, "likes": 0, "comments": 0}
\ No newline at end of file
+        print("❌ Error fetching post date range:", e)
+        return None, None
+
+
+def get_monthly_post_stats(user_id, start_date=None, end_date=None, hashtag=None):
+    """Posts and average likes/comments per schedule month, oldest first."""
+    where, params = _analytics_filters(user_id, start_date, end_date, hashtag)
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                f"""
+                SELECT DATE_FORMAT(schedule_date, '%Y-%m') AS month,
+                       COUNT(*) AS posts,
+                       AVG(likes) AS avg_likes,
+                       AVG(comments) AS avg_comments
+                FROM posts WHERE {where}
+                GROUP BY month ORDER BY month
+                """,
+                tuple(params),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows
+    except Error as e:
+        print("❌ Error fetching monthly stats:", e)
+        return []
+
+
+def get_word_count_distribution(user_id, start_date=None, end_date=None, hashtag=None):
+    """[(word_count, posts)] — words counted as space-separated runs, like str.split()."""
+    where, params = _analytics_filters(user_id, start_date, end_date, hashtag)
+    words = (
+        "CHAR_LENGTH(TRIM(REGEXP_REPLACE(content, '[[:space:]]+', ' '))) - "
+        "CHAR_LENGTH(REPLACE(TRIM(REGEXP_REPLACE(content, '[[:space:]]+', ' ')), ' ', '')) + 1"
+    )
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {words} AS word_count, COUNT(*) FROM posts WHERE {where} "
+                "GROUP BY word_count ORDER BY word_count",
+                tuple(params),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows
+    except Error as e:
+        print("❌ Error fetching word counts:", e)
+        return []
+
+
+def get_top_hashtags(user_id, start_date=None, end_date=None, hashtag=None, limit=10):
+    """[(tag, uses)] most frequent first, counted from post_hashtags."""
+    where, params = _analytics_filters(user_id, start_date, end_date, hashtag)
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                SELECT ph.tag, COUNT(*) AS uses
+                FROM post_hashtags ph
+                JOIN (SELECT id FROM posts WHERE {where}) p ON p.id = ph.post_id
+                WHERE ph.user_id = %s
+                GROUP BY ph.tag ORDER BY uses DESC, ph.tag LIMIT %s
+                """,
+                tuple(params) + (user_id, limit),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows
+    except Error as e:
+        print("❌ Error fetching top hashtags:", e)
+        return []
+
+
+# ---------- Generation Cache ----------
+# Prompt -> response store used by llm.GenerationCache. Keys are content hashes
+# (model + prompt + parameters), so identical prompts share an entry across users.
+def get_cached_generation(cache_key, ttl):
+    """Return the cached response text if younger than `ttl` seconds, else None."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT response FROM generation_cache
+                WHERE cache_key = %s AND created_at >= NOW() - INTERVAL %s SECOND
+                """,
+                (cache_key, int(ttl)),
+            )
+            row = cursor.fetchone()
+            if row:
+                cursor.execute(
+                    "UPDATE generation_cache SET hits = hits + 1, last_used_at = NOW() WHERE cache_key = %s",
+                    (cache_key,),
+                )
+                conn.commit()
+            cursor.close()
+        return row[0] if row else None
+    except Error as e:
+        print("❌ Error reading generation cache:", e)
+        return None
+
+
+def save_cached_generation(cache_key, model, response, max_entries):
+    """Store a response, evicting least-recently-used entries beyond `max_entries`."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO generation_cache (cache_key, model, response) VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE response = VALUES(response), hits = 0,
+                    created_at = NOW(), last_used_at = NOW()
+                """,
+                (cache_key, model, response),
+            )
+            cursor.execute("SELECT COUNT(*) FROM generation_cache")
+            excess = cursor.fetchone()[0] - max_entries
+            if excess > 0:
+                cursor.execute(
+                    "DELETE FROM generation_cache ORDER BY last_used_at LIMIT %s", (excess,)
+                )
+            conn.commit()
+            cursor.close()
+        return True
+    except Error as e:
+        print("❌ Error writing generation cache:", e)
+        return False
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["rebuild-stats"]:
+        target = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        if init_db() and rebuild_user_stats(target):
+            print("✅ user_stats rebuilt")
+        else:
+            sys.exit(1)
+    elif sys.argv[1:2] == ["backfill-hashtags"]:
+        done = backfill_post_hashtags() if init_db() else None
+        if done is None:
+            sys.exit(1)
+        print(f"✅ Indexed hashtags for {done} post(s)")
+    else:
+        print("Usage: python database.py rebuild-stats [user_id] | backfill-hashtags")
+        sys.exit(2)
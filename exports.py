@@ -0,0 +1,94 @@
+# exports.py
+# Analytics exports written row batch by row batch from database.iter_posts,
+# so only one batch is in memory however many posts are exported. Each writer
+# takes an iterable of row dicts and a binary file object.
+
+import csv
+import io
+from itertools import islice
+
+EXPORT_BATCH_ROWS = 1000
+
+# every posts column, in table order, as the old DataFrame export wrote them
+EXPORT_COLUMNS = ("id", "user_id", "role", "industry", "interests", "content", "hashtags",
+                  "schedule_date", "likes", "comments", "created_at")
+
+
+def _batches(rows, size=EXPORT_BATCH_ROWS):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(rows, out, columns=EXPORT_COLUMNS):
+    """Stream rows to `out` as UTF-8 CSV. Returns the number of rows written."""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    try:
+        writer = csv.DictWriter(text, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        count = 0
+        for batch in _batches(rows):
+            writer.writerows(batch)
+            count += len(batch)
+        return count
+    finally:
+        text.detach()  # leave `out` open for the caller
+
+
+def write_xlsx(rows, out, columns=EXPORT_COLUMNS):
+    """Stream rows into a write-only openpyxl workbook. Returns the number of rows written."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Analytics")
+    ws.append(list(columns))
+    count = 0
+    for row in rows:
+        ws.append([row.get(col) for col in columns])
+        count += 1
+    wb.save(out)
+    return count
+
+
+def write_parquet(rows, out, columns=EXPORT_COLUMNS):
+    """Write rows to Parquet one row group per batch. Needs pyarrow. Returns the number of rows written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("role", pa.string()),
+        ("industry", pa.string()),
+        ("interests", pa.string()),
+        ("content", pa.string()),
+        ("hashtags", pa.string()),
+        ("schedule_date", pa.date32()),
+        ("likes", pa.int64()),
+        ("comments", pa.int64()),
+        ("created_at", pa.timestamp("s")),
+    ])
+    schema = pa.schema([schema.field(col) for col in columns])
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for batch in _batches(rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+# label -> (file suffix, mime type, writer)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv", write_csv),
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx),
+    "Parquet": (".parquet", "application/vnd.apache.parquet", write_parquet),
+}
+
+
+def export_rows(rows, fmt, out, columns=EXPORT_COLUMNS):
+    """Write rows to `out` in one of EXPORT_FORMATS. Returns the number of rows written."""
+    _, _, writer = EXPORT_FORMATS[fmt]
+    return writer(rows, out, columns)
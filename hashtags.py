@@ -0,0 +1,36 @@
+# hashtags.py
+# Hashtag normalization shared by the UI (optimize_hashtags) and the
+# post_hashtags index in database.py, so both agree on what a tag is.
+
+
+def normalize_hashtags(hashtags_str):
+    """Split a free-text hashtag string into unique, lower-case '#tags' (order kept)."""
+    if not hashtags_str:
+        return []
+
+    # Split by spaces or commas
+    raw_tags = hashtags_str.replace(",", " ").split()
+
+    cleaned = []
+    for tag in raw_tags:
+        tag = tag.strip().lower()  # normalize case
+        if not tag:
+            continue
+        if not tag.startswith("#"):
+            tag = "#" + tag
+        cleaned.append(tag)
+
+    # Remove duplicates while keeping order
+    seen = set()
+    unique_tags = []
+    for t in cleaned:
+        if t not in seen:
+            unique_tags.append(t)
+            seen.add(t)
+    return unique_tags
+
+
+def optimize_hashtags(hashtags_str):
+    """Clean, normalize, and optimize hashtags for LinkedIn best practices"""
+    # Limit to max 5 hashtags
+    return " ".join(normalize_hashtags(hashtags_str)[:5])
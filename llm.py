@@ -0,0 +1,411 @@
+# llm.py
+# Prompting and response parsing for post generation. Kept free of Streamlit so
+# it can be exercised against StubModel without a Gemini key.
+
+import functools
+import hashlib
+import json
+import os
+import re
+
+from resilience import GuardedModel, default_guard
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+DEFAULT_GENERATION_CONFIG = {"temperature": 0.9, "max_output_tokens": 1024}
+DEFAULT_SAFETY_SETTINGS = None  # use Gemini's defaults
+GEN_CACHE_TTL = int(os.getenv("GEN_CACHE_TTL", str(7 * 24 * 3600)))  # seconds; 0 disables the cache
+GEN_CACHE_MAX_ENTRIES = int(os.getenv("GEN_CACHE_MAX_ENTRIES", "5000"))
+
+
+# ---------- Prompts ----------
+def build_post_prompt(name, role, industry, interests):
+    return f"""You are an expert LinkedIn content writer.
+Create a concise, engaging LinkedIn post for {name}, a {role} in the {industry} industry.
+Include a friendly tone, one short value takeaway in bullet form, and a soft call-to-action.
+Incorporate interests: {interests}. Keep it under 120 words. No emojis in bullet lines."""
+
+
+def build_hashtag_prompt(industry, interests):
+    return f"Suggest 5 short, relevant LinkedIn hashtags for {industry} and {interests}. Output as space-separated tags."
+
+
+HASHTAG_LINE = "Hashtags:"
+
+
+def build_stream_prompt(name, role, industry, interests):
+    """Plain-text post (displayable while streaming) followed by one hashtag line."""
+    return f"""{build_post_prompt(name, role, industry, interests)}
+
+After the post, on its own final line, write "{HASHTAG_LINE}" followed by 5 short,
+relevant LinkedIn hashtags for {industry} and {interests}, space-separated."""
+
+
+def build_structured_prompt(name, role, industry, interests, variants=0):
+    """One prompt that asks for the post, its hashtags and optional alternates as JSON."""
+    extra = ""
+    if variants:
+        extra = f'\n  "variants": [{variants} alternative versions of the post, same rules],'
+    return f"""{build_post_prompt(name, role, industry, interests)}
+
+Also suggest 5 short, relevant LinkedIn hashtags for {industry} and {interests}.
+Respond with JSON only, no markdown, in exactly this shape:
+{{
+  "post": "the post text",{extra}
+  "hashtags": ["#tag1", "#tag2", "#tag3", "#tag4", "#tag5"]
+}}"""
+
+
+# ---------- Parsing ----------
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def parse_structured_post(text):
+    """Validate a structured response. Returns {"post", "hashtags", "variants"}; raises ValueError."""
+    if not text:
+        raise ValueError("empty response")
+    try:
+        data = json.loads(_FENCE_RE.sub("", text.strip()))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"response is not JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("response JSON is not an object")
+
+    post = data.get("post")
+    if not isinstance(post, str) or not post.strip():
+        raise ValueError("missing 'post'")
+
+    hashtags = data.get("hashtags", [])
+    if isinstance(hashtags, str):
+        hashtags = hashtags.replace(",", " ").split()
+    if not isinstance(hashtags, list) or not all(isinstance(t, str) for t in hashtags):
+        raise ValueError("'hashtags' must be a list of strings")
+
+    variants = data.get("variants") or []
+    if not isinstance(variants, list) or not all(isinstance(v, str) for v in variants):
+        raise ValueError("'variants' must be a list of strings")
+
+    return {
+        "post": post.strip(),
+        "hashtags": " ".join(t.strip() for t in hashtags if t.strip()),
+        "variants": [v.strip() for v in variants if v.strip()],
+    }
+
+
+def fallback_post(name, role, industry, interests):
+    """Always works: no API needed."""
+    post = f"""Excited to share a quick update! 👋
+
+I'm {name}, working towards {role} in the {industry} space. Recently I explored topics around {interests}.
+Key learnings:
+• Stay consistent with hands-on practice
+• Share small wins publicly
+• Ask for feedback from the community
+
+If you're also into {industry}, let's connect and learn together! #learning #growth"""
+    hashtags = "#career #learning #coding"
+    return post.strip(), hashtags
+
+
+# ---------- Generation ----------
+def generate_structured(model, name, role, industry, interests, variants=0):
+    """Generate post + hashtags with a single request, falling back to two calls.
+
+    `model` is anything with a Gemini-style `generate_content(prompt, **kwargs)`
+    returning an object with `.text`. The two-call path is only used when the
+    structured response cannot be parsed.
+    """
+    prompt = build_structured_prompt(name, role, industry, interests, variants)
+    resp = model.generate_content(
+        prompt, generation_config={"response_mime_type": "application/json"}
+    )
+    try:
+        return parse_structured_post(resp.text)
+    except ValueError as e:
+        print("⚠️ Structured response unusable, using two-call path:", e)
+
+    post_content = model.generate_content(build_post_prompt(name, role, industry, interests)).text.strip()
+    hashtags = model.generate_content(build_hashtag_prompt(industry, interests)).text.strip()
+    return {"post": post_content, "hashtags": hashtags, "variants": []}
+
+
+def _chunk_text(chunk):
+    """Text of a streamed chunk; Gemini raises ValueError for chunks without text."""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+
+def stream_post(model, name, role, industry, interests, out=None):
+    """Yield the post text incrementally from a single request.
+
+    The prompt asks for a trailing "Hashtags:" line; it is held back from the
+    stream and, once the stream ends, stored in out["hashtags"] ("" if the
+    model left it out). Plain text rather than JSON, since partial JSON isn't
+    displayable.
+    """
+    marker = HASHTAG_LINE.lower()
+    pending, tail = "", None
+    for chunk in model.generate_content(build_stream_prompt(name, role, industry, interests), stream=True):
+        text = _chunk_text(chunk)
+        if not text:
+            continue
+        if tail is not None:
+            tail += text
+            continue
+        pending += text
+        at = pending.lower().find(marker)
+        if at >= 0:
+            tail = pending[at + len(marker):]
+            if pending[:at]:
+                yield pending[:at]
+            pending = ""
+            continue
+        # hold back the longest suffix that could still grow into the marker,
+        # wherever it falls ("...great post. Hash" + "tags: #a")
+        lowered = pending.lower()
+        keep = next((k for k in range(min(len(marker) - 1, len(pending)), 0, -1)
+                     if lowered.endswith(marker[:k])), 0)
+        if len(pending) > keep:
+            yield pending[:len(pending) - keep]
+        pending = pending[len(pending) - keep:]
+    if pending:
+        yield pending
+    if out is not None:
+        out["hashtags"] = " ".join((tail or "").split())
+
+
+def generate_hashtags(model, industry, interests):
+    return model.generate_content(build_hashtag_prompt(industry, interests)).text.strip()
+
+
+# ---------- Generation cache ----------
+class GenerationCache:
+    """Content-addressed prompt -> response cache with TTL and a max size.
+
+    `lookup(key, ttl)` and `save(key, model_name, text, max_entries)` do the
+    storage; the app wires them to the generation_cache table in database.py.
+    """
+
+    def __init__(self, lookup, save, ttl=GEN_CACHE_TTL, max_entries=GEN_CACHE_MAX_ENTRIES):
+        self.lookup = lookup
+        self.save = save
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(model_name, prompt, params):
+        payload = json.dumps([model_name, prompt, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedModel:
+    """Wraps a model so generate_content is served from a GenerationCache.
+
+    With fresh=True the cache is skipped for reads but the new answer is still
+    stored, so the next plain request sees the latest variant. Only usable
+    answers are stored: empty text never, and JSON-mode answers only if
+    parse_structured_post accepts them, so one malformed reply isn't replayed
+    for the whole TTL.
+    """
+
+    def __init__(self, model, model_name, cache, params=None, fresh=False):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache
+        self.params = params or {}
+        self.fresh = fresh
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        # streamed and blocking calls for the same prompt share one entry
+        key = GenerationCache.key(self.model_name, prompt, [self.params, kwargs])
+        if not self.fresh:
+            text = self.cache.lookup(key, self.cache.ttl)
+            if text is not None:
+                return [TextResponse(text)] if stream else TextResponse(text)
+        if stream:
+            return self._stream_and_save(key, prompt, kwargs)
+        resp = self.model.generate_content(prompt, **kwargs)
+        self._save_if_usable(key, resp.text, kwargs)
+        return resp
+
+    def _stream_and_save(self, key, prompt, kwargs):
+        parts = []
+        for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+            parts.append(_chunk_text(chunk))
+            yield chunk
+        self._save_if_usable(key, "".join(parts), kwargs)
+
+    def _save_if_usable(self, key, text, kwargs):
+        if not text or not text.strip():
+            return
+        config = kwargs.get("generation_config") or {}
+        if config.get("response_mime_type") == "application/json":
+            try:
+                parse_structured_post(text)
+            except ValueError:
+                return
+        self.cache.save(key, self.model_name, text, self.cache.max_entries)
+
+
+def default_generation_cache():
+    """SQL-backed cache, or None when disabled with GEN_CACHE_TTL=0."""
+    if GEN_CACHE_TTL <= 0:
+        return None
+    from database import get_cached_generation, save_cached_generation
+    return GenerationCache(get_cached_generation, save_cached_generation)
+
+
+# ---------- Local stub ----------
+class TextResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubAPIError(Exception):
+    """HTTP-style error for StubModel, e.g. StubAPIError(429) for quota exhaustion."""
+
+    def __init__(self, code, message=""):
+        super().__init__(message or f"stub API error {code}")
+        self.code = code
+
+
+class StubModel:
+    """Stand-in for genai.GenerativeModel that answers deterministically, offline.
+
+    `responses` is an optional list of raw texts returned in order (to inject
+    malformed JSON, for instance); otherwise a valid structured reply is built.
+    `errors` is a list of exceptions raised by the next calls, in order (e.g.
+    StubAPIError(429) or TimeoutError()). `calls` records every prompt received.
+    Streamed replies are cut into `chunk_size`-character chunks.
+    """
+
+    def __init__(self, responses=None, errors=None, chunk_size=8):
+        self.responses = list(responses or [])
+        self.errors = list(errors or [])
+        self.chunk_size = chunk_size
+        self.calls = []
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls.append(prompt)
+        if self.errors:
+            raise self.errors.pop(0)
+        if stream:
+            return self._stream(self._reply(prompt), self.chunk_size)
+        return self._reply(prompt)
+
+    def _stream(self, resp, chunk_size=8):
+        text = resp.text
+        for i in range(0, len(text), chunk_size):
+            yield TextResponse(text[i:i + chunk_size])
+
+    def _reply(self, prompt):
+        if self.responses:
+            return TextResponse(self.responses.pop(0))
+        if f'"{HASHTAG_LINE}"' in prompt:
+            return TextResponse(
+                "Stub post: consistency beats intensity.\n• Ship small things often\nLet's connect!\n"
+                f"{HASHTAG_LINE} #learning #growth #career #tech #ai"
+            )
+        if "Respond with JSON only" in prompt:
+            return TextResponse(json.dumps({
+                "post": "Stub post: consistency beats intensity.\n• Ship small things often\nLet's connect!",
+                "hashtags": ["#learning", "#growth", "#career", "#tech", "#ai"],
+            }))
+        if "hashtags" in prompt:
+            return TextResponse("#learning #growth #career #tech #ai")
+        return TextResponse("Stub post: consistency beats intensity.")
+
+
+# ---------- Backends ----------
+# Every backend exposes generate(name, role, industry, interests, variants=0)
+# returning {"post", "hashtags", "variants"}, plus stream(..., out) yielding post
+# chunks (hashtags into out) and hashtags(industry, interests), so the app, benchmarks and tests
+# can swap the Gemini client, the template fallback and the stub freely.
+class TemplateBackend:
+    name = "template"
+
+    def generate(self, name, role, industry, interests, variants=0, fresh=False):
+        post, hashtags = fallback_post(name, role, industry, interests)
+        return {"post": post, "hashtags": hashtags, "variants": []}
+
+    def stream(self, name, role, industry, interests, fresh=False, out=None):
+        post, hashtags = fallback_post(name, role, industry, interests)
+        if out is not None:
+            out["hashtags"] = hashtags
+        yield post
+
+    def hashtags(self, industry, interests, fresh=False):
+        return fallback_post("", "", industry, interests)[1]
+
+
+class _ModelBackend:
+    """Shared plumbing for backends that drive a generate_content-style model."""
+    model_name = ""
+    params = None
+    cache = None
+
+    def _model_for(self, fresh):
+        if self.cache is None:
+            return self.model
+        return CachedModel(self.model, self.model_name, self.cache, self.params, fresh)
+
+    def generate(self, name, role, industry, interests, variants=0, fresh=False):
+        return generate_structured(self._model_for(fresh), name, role, industry, interests, variants)
+
+    def stream(self, name, role, industry, interests, fresh=False, out=None):
+        """Yield post text chunks as they arrive; hashtags land in out["hashtags"] at the end."""
+        return stream_post(self._model_for(fresh), name, role, industry, interests, out)
+
+    def hashtags(self, industry, interests, fresh=False):
+        return generate_hashtags(self._model_for(fresh), industry, interests)
+
+
+class StubBackend(_ModelBackend):
+    name = "stub"
+    model_name = "stub"
+
+    def __init__(self, responses=None, cache=None, errors=None, guard=None):
+        self.stub = StubModel(responses, errors)
+        self.model = GuardedModel(self.stub, guard) if guard else self.stub
+        self.cache = cache
+
+
+class GeminiBackend(_ModelBackend):
+    name = "gemini"
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL,
+                 generation_config=None, safety_settings=DEFAULT_SAFETY_SETTINGS, cache=None, guard=None):
+        import google.generativeai as genai  # only needed when Gemini is actually used
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.params = {
+            "generation_config": generation_config or DEFAULT_GENERATION_CONFIG,
+            "safety_settings": safety_settings,
+        }
+        # rate limits / retries / breaker sit under the cache so cache hits skip them
+        self.model = GuardedModel(
+            genai.GenerativeModel(model_name, **self.params),
+            guard or default_guard(),
+            self.params["generation_config"].get("max_output_tokens", 1024),
+        )
+        self.cache = cache
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend(kind=None, model_name=DEFAULT_MODEL):
+    """Process-wide backend, built once per (kind, model).
+
+    kind defaults to $LLM_BACKEND, else "gemini" when GEMINI_API_KEY is set
+    and "template" otherwise.
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    kind = kind or os.getenv("LLM_BACKEND") or ("gemini" if api_key else "template")
+    if kind == "gemini":
+        return GeminiBackend(api_key, model_name, cache=default_generation_cache())
+    if kind == "stub":
+        return StubBackend()
+    if kind == "template":
+        return TemplateBackend()
+    raise ValueError(f"Unknown LLM backend: {kind}")
@@ -0,0 +1,277 @@
+# pdf_export.py
+# ReportLab rendering for post exports. PDFs are built only when a user asks
+# for one and memoized by post id + content hash.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import simpleSplit
+
+PDF_CACHE_MAX = int(os.getenv("PDF_CACHE_MAX", "128"))  # rendered PDFs kept per process
+
+_pdf_cache = OrderedDict()  # (post_id, digest) -> bytes
+_pdf_cache_lock = threading.Lock()
+
+
+def make_pdf_bytes(content, hashtags, schedule_date):
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    max_width = width - 100
+    y = 750
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y, "LinkedIn Post")
+    y -= 30
+
+    c.setFont("Helvetica", 11)
+    wrapped = simpleSplit(content, "Helvetica", 11, max_width)
+    for line in wrapped:
+        if y < 80:
+            c.showPage()
+            y = 750
+            c.setFont("Helvetica", 11)
+        c.drawString(50, y, line)
+        y -= 16
+
+    y -= 10
+    c.setFont("Helvetica-Oblique", 10)
+    c.drawString(50, y, f"Hashtags: {hashtags}")
+    y -= 16
+    c.drawString(50, y, f"Scheduled Date: {schedule_date}")
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def post_pdf(post_id, content, hashtags, schedule_date):
+    """make_pdf_bytes memoized by post id + content hash (LRU, PDF_CACHE_MAX entries).
+
+    Editing a post changes the digest, so a stale PDF is never served.
+    """
+    digest = hashlib.sha1(f"{content}\x00{hashtags}\x00{schedule_date}".encode("utf-8")).hexdigest()
+    key = (post_id, digest)
+    with _pdf_cache_lock:
+        if key in _pdf_cache:
+            _pdf_cache.move_to_end(key)
+            return _pdf_cache[key]
+
+    pdf = make_pdf_bytes(content, hashtags, schedule_date)
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf
+        while len(_pdf_cache) > PDF_CACHE_MAX:
+            _pdf_cache.popitem(last=False)
+    return pdf
+
+
+# ---------- Bulk export ----------
+# One document, a table of contents, then one section per post. Posts are
+# consumed from an iterator twice (pass 1 lays out page numbers for the TOC,
+# pass 2 draws), so post rows are never all held at once. The output is not
+# streamed, though: the canvas keeps every finished page (compressed) until
+# save(), so memory grows with page count, roughly 35 KB per page (about
+# 35 MiB at 1,000 pages, 69 MiB at 4,100).
+TOP_Y = 750
+BOTTOM_Y = 80
+LINE_GAP = 16
+TOC_LINES_PER_PAGE = 40
+
+
+def _section_layout(content, max_width):
+    """Place a post's heading, body and footer; returns [(page_offset, y, kind, text)]."""
+    placed = []
+    page, y = 0, TOP_Y
+    placed.append((page, y, "heading", None))
+    y -= 26
+    for line in simpleSplit(content or "", "Helvetica", 11, max_width):
+        if y < BOTTOM_Y:
+            page, y = page + 1, TOP_Y
+        placed.append((page, y, "body", line))
+        y -= LINE_GAP
+    y -= 10
+    for kind in ("hashtags", "date"):
+        if y < BOTTOM_Y:
+            page, y = page + 1, TOP_Y
+        placed.append((page, y, kind, None))
+        y -= LINE_GAP
+    return placed
+
+
+def _section_pages(content, max_width):
+    return _section_layout(content, max_width)[-1][0] + 1
+
+
+def _toc_pages(count):
+    return max(1, -(-(count + 1) // TOC_LINES_PER_PAGE))  # +1 for the title line
+
+
+def _layout_toc(posts, max_width):
+    """Pass 1: [(number, schedule_date, pages)] for every post."""
+    return [
+        (number, post.get("schedule_date"), _section_pages(post.get("content"), max_width))
+        for number, post in enumerate(posts, start=1)
+    ]
+
+
+def _draw_toc(c, title, toc, links=True):
+    """Draw the table of contents starting on the current page; ends with showPage()."""
+    width, _ = letter
+    start_page = _toc_pages(len(toc)) + 1
+    y = TOP_Y
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y, f"{title} ({len(toc)} posts)")
+    y -= 30
+    lines = 1  # the title counts as a line, matching _toc_pages()
+    for number, sdate, pages in toc:
+        if lines == TOC_LINES_PER_PAGE:
+            c.showPage()
+            y, lines = TOP_Y, 0
+        lines += 1
+        c.setFont("Helvetica", 11)
+        c.drawString(50, y, f"Post {number} · {sdate}")
+        c.drawRightString(width - 50, y, str(start_page))
+        if links:
+            c.linkRect("", f"post{number}", (50, y - 3, width - 50, y + 11), relative=0)
+        y -= LINE_GAP
+        start_page += pages
+    c.showPage()
+
+
+def _draw_section(c, number, post, max_width, bookmark=True):
+    """Draw one post section; ends with showPage(). Returns pages used."""
+    current = 0
+    if bookmark:
+        c.bookmarkPage(f"post{number}")
+        c.addOutlineEntry(f"Post {number} · {post.get('schedule_date')}", f"post{number}", level=0)
+    for page, y, kind, text in _section_layout(post.get("content"), max_width):
+        if page != current:
+            c.showPage()
+            current = page
+        if kind == "heading":
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(50, y, f"Post {number} · {post.get('schedule_date')}")
+        elif kind == "body":
+            c.setFont("Helvetica", 11)
+            c.drawString(50, y, text)
+        elif kind == "hashtags":
+            c.setFont("Helvetica-Oblique", 10)
+            c.drawString(50, y, f"Hashtags: {post.get('hashtags') or ''}")
+        else:
+            c.setFont("Helvetica-Oblique", 10)
+            c.drawString(50, y, f"Scheduled Date: {post.get('schedule_date')}")
+    c.showPage()
+    return current + 1
+
+
+def export_posts_pdf(posts, out, title="LinkedIn Posts", toc=None):
+    """Write every post from `posts()` into a single paginated PDF on `out`.
+
+    `posts` is a zero-argument callable returning a fresh iterable of post
+    dicts (content, hashtags, schedule_date); it is called twice, or once if
+    `toc` (from a previous _layout_toc pass) is given. `out` is a path or
+    binary file object. Returns the total number of pages written.
+    """
+    width, _ = letter
+    max_width = width - 100
+
+    if toc is None:
+        toc = _layout_toc(posts(), max_width)
+    c = canvas.Canvas(out, pagesize=letter, pageCompression=1)
+    c.setTitle(title)
+    _draw_toc(c, title, toc)
+    total = _toc_pages(len(toc))
+    del toc
+
+    # Pass 2: one section per post
+    for number, post in enumerate(posts(), start=1):
+        total += _draw_section(c, number, post, max_width)
+
+    c.save()
+    return total
+
+
+# ---------- Parallel bulk export ----------
+# ReportLab is pure Python and CPU bound, so large exports are split into
+# chunks of posts rendered in worker processes and merged in order with pypdf.
+# Small jobs stay in-process where pool start-up would cost more than it saves.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1
+PDF_CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", "250"))      # posts per worker task
+PDF_PARALLEL_MIN = int(os.getenv("PDF_PARALLEL_MIN", "500"))  # below this, render in-process
+
+
+def _render_chunk(first_number, posts):
+    """Worker task: render a run of post sections to standalone PDF bytes."""
+    width, _ = letter
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter, pageCompression=1)
+    for offset, post in enumerate(posts):
+        _draw_section(c, first_number + offset, post, width - 100, bookmark=False)
+    c.save()
+    return buffer.getvalue()
+
+
+def _chunks(posts, size):
+    chunk, first = [], 1
+    for number, post in enumerate(posts, start=1):
+        chunk.append({k: post.get(k) for k in ("content", "hashtags", "schedule_date")})
+        if len(chunk) == size:
+            yield first, chunk
+            chunk, first = [], number + 1
+    if chunk:
+        yield first, chunk
+
+
+def export_posts_pdf_parallel(posts, out, title="LinkedIn Posts", workers=PDF_WORKERS,
+                              chunk_size=PDF_CHUNK_SIZE, min_parallel=PDF_PARALLEL_MIN):
+    """Same output as export_posts_pdf, with post sections rendered across a process pool.
+
+    Falls back to export_posts_pdf for jobs under `min_parallel` posts or a
+    single worker. At most 2 x workers chunks are rendering at once, but
+    PdfWriter holds every merged page until write(), so memory still grows
+    with the page count. TOC entries are not clickable here (the PDF outline
+    still links every post).
+    """
+    import multiprocessing
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    from pypdf import PdfWriter
+
+    width, _ = letter
+    toc = _layout_toc(posts(), width - 100)
+    if workers <= 1 or len(toc) < min_parallel:
+        return export_posts_pdf(posts, out, title, toc=toc)
+
+    toc_buffer = BytesIO()
+    c = canvas.Canvas(toc_buffer, pagesize=letter, pageCompression=1)
+    c.setTitle(title)
+    _draw_toc(c, title, toc, links=False)
+    c.save()
+
+    writer = PdfWriter()
+    writer.append(BytesIO(toc_buffer.getvalue()))
+    writer.add_metadata({"/Title": title})
+
+    # spawn: never fork the (threaded) Streamlit server process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for first, chunk in _chunks(posts(), chunk_size):
+            pending.append(pool.submit(_render_chunk, first, chunk))
+            if len(pending) >= workers * 2:
+                writer.append(BytesIO(pending.popleft().result()))
+        while pending:
+            writer.append(BytesIO(pending.popleft().result()))
+
+    page = _toc_pages(len(toc))
+    for number, sdate, pages in toc:
+        writer.add_outline_item(f"Post {number} · {sdate}", page)
+        page += pages
+
+    writer.write(out)
+    return page
@@ -0,0 +1,112 @@
+# planner.py
+# Batch content planning: generate a run of posts for a date range concurrently
+# and save them in one transaction. Kept free of Streamlit so it can be
+# benchmarked offline with LLM_BACKEND=stub.
+
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from resilience import CircuitOpenError, RateLimitedError
+
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+PER_KEY_CONCURRENCY = int(os.getenv("PER_KEY_CONCURRENCY", "4"))  # in-flight calls per API key
+MAX_BATCH_POSTS = 62  # two months of daily posts
+
+CADENCES = {
+    "Daily": 1,
+    "Weekdays": "weekdays",
+    "Every 2 days": 2,
+    "Twice a week": "mon_thu",
+    "Weekly": 7,
+}
+
+_key_limits = {}
+_key_limits_lock = threading.Lock()
+
+
+def _key_semaphore(key):
+    """Shared semaphore per API key, so concurrent batches don't exceed its limit together."""
+    with _key_limits_lock:
+        if key not in _key_limits:
+            _key_limits[key] = threading.BoundedSemaphore(PER_KEY_CONCURRENCY)
+        return _key_limits[key]
+
+
+def plan_dates(start, end, cadence):
+    """Dates from start to end (inclusive) following a CADENCES value."""
+    step = CADENCES.get(cadence, cadence)
+    dates = []
+    day = start
+    while day <= end and len(dates) < MAX_BATCH_POSTS:
+        if step == "weekdays":
+            keep = day.weekday() < 5
+        elif step == "mon_thu":
+            keep = day.weekday() in (0, 3)
+        else:
+            keep = (day - start).days % int(step) == 0
+        if keep:
+            dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def generate_batch(backend, name, role, industry, interests, dates,
+                   max_workers=BATCH_MAX_WORKERS, api_key_id=None):
+    """Generate one post per date concurrently.
+
+    Returns (posts, stats). posts is a list of {"schedule_date", "content",
+    "hashtags"} in date order for the slots that generated; failed slots
+    (API errors, local rate limit, open circuit breaker) are left out rather
+    than filled with the template, and listed in stats["failed_dates"] with
+    their count in stats["failures"]. stats also has posts_per_sec and
+    latency percentiles (seconds) to help size API quotas.
+    """
+    limiter = _key_semaphore(api_key_id or backend.name)
+
+    def one(day):
+        with limiter:
+            started = time.perf_counter()
+            try:
+                result = backend.generate(name, role, industry, interests, fresh=True)
+                post = {"schedule_date": day, "content": result["post"], "hashtags": result["hashtags"]}
+            except (CircuitOpenError, RateLimitedError) as e:
+                print(f"⏳ Batch slot {day} skipped:", e)
+                post = None
+            except Exception as e:
+                print(f"⚠️ Batch generation failed for {day}:", e)
+                post = None
+            latency = time.perf_counter() - started
+        return post, latency, post is not None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(one, dates))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency, _ in results]
+    failures = sum(1 for _, _, ok in results if not ok)
+    stats = {
+        "posts": len(results),
+        "failures": failures,
+        "failed_dates": [day for day, (_, _, ok) in zip(dates, results) if not ok],
+        "elapsed": elapsed,
+        # generated posts only; skipped or failed slots aren't throughput
+        "posts_per_sec": (len(results) - failures) / elapsed if elapsed else 0.0,
+        "p50": _percentile(latencies, 50),
+        "p90": _percentile(latencies, 90),
+        "p99": _percentile(latencies, 99),
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+    }
+    return [post for post, _, ok in results if ok], stats
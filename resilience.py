@@ -0,0 +1,252 @@
+# resilience.py
+# Client-side protection for LLM calls: token-bucket rate limiting, retries
+# with jittered backoff and a circuit breaker. Shared by every session in the
+# process so one user's burst cannot push everyone into quota errors.
+
+import os
+import random
+import threading
+import time
+
+LLM_RPM = float(os.getenv("LLM_RPM", "15"))                  # requests per minute
+LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))             # tokens per minute
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))  # seconds
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_LIMIT_WAIT = float(os.getenv("LLM_LIMIT_WAIT", "20"))    # max seconds to queue for the rate limiter
+BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))  # consecutive failures to open
+BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))       # seconds before a trial call
+
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimitedError(Exception):
+    """The local rate limiter could not grant capacity in time."""
+
+
+class CircuitOpenError(Exception):
+    """The API is considered unhealthy; callers should use the fallback."""
+
+
+def is_retryable(exc):
+    """429/5xx responses and timeouts are worth retrying; everything else is not.
+
+    Checked by status code or class name so google.api_core need not be imported.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(exc, "code", None)
+    code = getattr(code, "value", code)  # grpc StatusCode enums carry (int, name)
+    if isinstance(code, tuple):
+        code = code[0]
+    if code in RETRYABLE_CODES:
+        return True
+    return type(exc).__name__ in {
+        "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+        "DeadlineExceeded", "InternalServerError",
+    }
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for the tokens/min bucket."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    def __init__(self, per_minute, capacity=None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take `amount` now if possible; otherwise return seconds until it would fit."""
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill(self.clock())
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def refund(self, amount):
+        """Give back capacity taken by reserve() for a request that was never sent."""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures; one trial call
+    (half-open) is let through after `reset_timeout` seconds."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a half-open trial slot without recording an outcome."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = self.clock()
+
+
+class CallGuard:
+    """Runs calls through the rate limiter, retry policy and circuit breaker.
+
+    `sleep` and `clock` are injectable together (tests pass a fake clock whose
+    sleep advances it); the buckets and default breaker share the same clock.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM, max_retries=LLM_MAX_RETRIES,
+                 breaker=None, sleep=time.sleep, clock=time.monotonic):
+        self.requests = TokenBucket(rpm, clock=clock)
+        self.tokens = TokenBucket(tpm, clock=clock)
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.sleep = sleep
+        self.clock = clock
+        self.stats = {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "rate_limited": 0, "short_circuited": 0, "throttle_wait": 0.0,
+        }
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key, n=1):
+        with self.stats_lock:
+            self.stats[key] += n
+
+    def _acquire(self, token_cost):
+        deadline = self.clock() + LLM_LIMIT_WAIT
+        taken = []
+        for bucket, amount in ((self.requests, 1), (self.tokens, token_cost)):
+            while True:
+                wait = bucket.reserve(amount)
+                if not wait:
+                    taken.append((bucket, amount))
+                    break
+                if self.clock() + wait > deadline:
+                    for held, held_amount in taken:  # the request is never sent
+                        held.refund(held_amount)
+                    self._count("rate_limited")
+                    raise RateLimitedError(f"Local rate limit: next slot in {wait:.1f}s")
+                self._count("throttle_wait", wait)
+                self.sleep(wait)
+
+    def _backoff(self, attempt):
+        # full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+    def call(self, fn, token_cost=1):
+        """Call fn() with limits applied. Raises CircuitOpenError while the API is unhealthy."""
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError("LLM API temporarily disabled after repeated failures")
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                self._acquire(token_cost)
+                result = fn()
+            except RateLimitedError:
+                self.breaker.release()  # throttled locally, says nothing about API health
+                raise
+            except Exception as exc:
+                if attempt < self.max_retries and is_retryable(exc):
+                    attempt += 1
+                    self._count("retries")
+                    self.sleep(self._backoff(attempt))
+                    continue
+                self._count("failures")
+                self.breaker.record_failure()
+                raise
+            self._count("successes")
+            self.breaker.record_success()
+            return result
+
+    def snapshot(self):
+        with self.stats_lock:
+            return dict(self.stats, breaker=self.breaker.state,
+                        consecutive_failures=self.breaker.failures)
+
+
+class GuardedModel:
+    """Wraps a generate_content-style model so every request goes through a CallGuard."""
+
+    def __init__(self, model, guard, max_output_tokens=1024):
+        self.model = model
+        self.guard = guard
+        self.max_output_tokens = max_output_tokens
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        cost = estimate_tokens(prompt) + self.max_output_tokens
+        if not stream:
+            return self.guard.call(lambda: self.model.generate_content(prompt, **kwargs), cost)
+        chunks = self.guard.call(lambda: self.model.generate_content(prompt, stream=True, **kwargs), cost)
+        return self._watch(chunks)
+
+    def _watch(self, chunks):
+        # errors mid-stream can't be retried, but they still count toward the breaker
+        try:
+            yield from chunks
+        except Exception:
+            self.guard.breaker.record_failure()
+            raise
+
+
+_default_guard = None
+_default_guard_lock = threading.Lock()
+
+
+def default_guard():
+    """Process-wide guard shared by every session."""
+    global _default_guard
+    with _default_guard_lock:
+        if _default_guard is None:
+            _default_guard = CallGuard()
+        return _default_guard
+
+
+def get_llm_stats():
+    """Counters for monitoring: calls, retries, throttling and breaker state."""
+    return default_guard().snapshot()
@@ -0,0 +1,41 @@
+# tests/test_query_plans.py
+# Runs benchmarks/check_query_plans.py against the MySQL server in DB_CONFIG.
+# Skipped when mysql-connector isn't installed or no server is reachable.
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+mysql_connector = pytest.importorskip("mysql.connector")
+
+
+def _server_reachable():
+    import database
+
+    config = {k: v for k, v in database.DB_CONFIG.items() if k != "database"}
+    try:
+        mysql_connector.connect(connection_timeout=3, **config).close()
+        return True
+    except mysql_connector.Error:
+        return False
+
+
+@pytest.mark.skipif(not _server_reachable(), reason="no MySQL server reachable with DB_CONFIG")
+def test_hot_queries_use_an_index():
+    import check_query_plans
+    import database
+
+    saved = dict(database.DB_CONFIG), database.CACHE_TTL
+    try:
+        assert check_query_plans.check(users=5, posts=500, drafts=100) == 0
+    finally:
+        database.DB_CONFIG.clear()
+        database.DB_CONFIG.update(saved[0])
+        database.CACHE_TTL = saved[1]
@@ -0,0 +1,151 @@
+# tests/test_resilience.py
+# CallGuard retries, circuit breaker and local rate limiting against StubModel,
+# on a fake clock so nothing actually sleeps.
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import StubAPIError, StubModel
+from resilience import (
+    CallGuard, CircuitBreaker, CircuitOpenError, GuardedModel, RateLimitedError,
+)
+
+
+class FakeClock:
+    """Monotonic clock whose sleep() just moves time forward."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_guard(clock, **kwargs):
+    kwargs.setdefault("rpm", 600)
+    kwargs.setdefault("tpm", 1_000_000)
+    return CallGuard(sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_retries_retryable_errors_then_succeeds():
+    clock = FakeClock()
+    guard = make_guard(clock, max_retries=3)
+    stub = StubModel(errors=[StubAPIError(429), TimeoutError()])
+    model = GuardedModel(stub, guard)
+
+    assert model.generate_content("Write a post").text
+    assert len(stub.calls) == 3
+    stats = guard.snapshot()
+    assert (stats["retries"], stats["successes"], stats["failures"]) == (2, 1, 0)
+    assert len(clock.slept) == 2  # one backoff per retry
+    assert stats["breaker"] == "closed"
+
+
+def test_non_retryable_error_is_not_retried():
+    clock = FakeClock()
+    guard = make_guard(clock, max_retries=3)
+    stub = StubModel(errors=[StubAPIError(400)])
+
+    with pytest.raises(StubAPIError):
+        GuardedModel(stub, guard).generate_content("Write a post")
+    assert len(stub.calls) == 1
+    assert guard.snapshot()["failures"] == 1
+
+
+def test_gives_up_after_max_retries():
+    clock = FakeClock()
+    guard = make_guard(clock, max_retries=2)
+    stub = StubModel(errors=[StubAPIError(503)] * 3)
+
+    with pytest.raises(StubAPIError):
+        GuardedModel(stub, guard).generate_content("Write a post")
+    assert len(stub.calls) == 3
+    assert guard.snapshot()["retries"] == 2
+
+
+def test_breaker_opens_then_half_open_trial_closes_it():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30, clock=clock)
+    guard = make_guard(clock, max_retries=0, breaker=breaker)
+    stub = StubModel(errors=[StubAPIError(500), StubAPIError(500)])
+    model = GuardedModel(stub, guard)
+
+    for _ in range(2):
+        with pytest.raises(StubAPIError):
+            model.generate_content("Write a post")
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        model.generate_content("Write a post")
+    assert len(stub.calls) == 2  # short-circuited, never reached the API
+    assert guard.snapshot()["short_circuited"] == 1
+
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert model.generate_content("Write a post").text
+    assert breaker.state == "closed"
+
+
+def test_failed_half_open_trial_reopens_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30, clock=clock)
+    guard = make_guard(clock, max_retries=0, breaker=breaker)
+    model = GuardedModel(StubModel(errors=[StubAPIError(500), StubAPIError(500)]), guard)
+
+    with pytest.raises(StubAPIError):
+        model.generate_content("Write a post")
+    clock.now += 30
+    assert breaker.allow() and not breaker.allow()  # only one trial at a time
+    breaker.release()
+
+    with pytest.raises(StubAPIError):
+        model.generate_content("Write a post")
+    assert breaker.state == "open"
+
+
+def test_throttles_on_the_injected_clock():
+    clock = FakeClock()
+    guard = make_guard(clock, rpm=6)  # 6-request burst, then one every 10s
+    model = GuardedModel(StubModel(), guard)
+
+    for _ in range(7):
+        model.generate_content("Write a post")
+    assert clock.slept == [pytest.approx(10.0)]
+    assert guard.snapshot()["throttle_wait"] == pytest.approx(10.0)
+
+
+def test_rate_limited_when_wait_exceeds_limit():
+    clock = FakeClock()
+    guard = make_guard(clock, rpm=1)
+    stub = StubModel()
+    model = GuardedModel(stub, guard)
+
+    model.generate_content("Write a post")
+    with pytest.raises(RateLimitedError):
+        model.generate_content("Write a post")  # next slot is 60s away
+    assert len(stub.calls) == 1
+    stats = guard.snapshot()
+    assert stats["rate_limited"] == 1
+    assert stats["breaker"] == "closed"  # local throttling doesn't count as an API failure
+
+
+def test_token_rejection_refunds_request_slot():
+    clock = FakeClock()
+    guard = make_guard(clock, rpm=60, tpm=100)
+
+    guard.call(lambda: "ok", token_cost=100)
+    requests_left = guard.requests.tokens
+    with pytest.raises(RateLimitedError):
+        guard.call(lambda: "ok", token_cost=100)  # tokens refill in 60s, over the wait limit
+    assert guard.requests.tokens == requests_left
@@ -0,0 +1,50 @@
+# tests/test_stream_post.py
+# stream_post must hold back the "Hashtags:" line however the stream is chunked.
+#
+#   python -m pytest tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import StubModel, stream_post
+
+
+def run(reply, chunk_size):
+    out = {}
+    model = StubModel(responses=[reply], chunk_size=chunk_size)
+    text = "".join(stream_post(model, "Ana", "Engineer", "Tech", "AI", out=out))
+    return text, out["hashtags"]
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 30))
+def test_marker_mid_line_split_across_chunks(chunk_size):
+    text, hashtags = run("Great post. Hashtags: #a #b", chunk_size)
+    assert text.strip() == "Great post."
+    assert hashtags == "#a #b"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 8, 100])
+def test_marker_on_its_own_line(chunk_size):
+    text, hashtags = run("Line one.\nLine two.\nhashtags: #learning #growth", chunk_size)
+    assert text == "Line one.\nLine two.\n"
+    assert hashtags == "#learning #growth"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 100])
+def test_partial_marker_that_never_completes_is_flushed(chunk_size):
+    text, hashtags = run("Follow the hash", chunk_size)
+    assert text == "Follow the hash"
+    assert hashtags == ""
+
+
+def test_split_exactly_inside_marker():
+    # "…great post. Hash" then "tags: #a #b"
+    model = StubModel(responses=["Great post. Hashtags: #a #b"], chunk_size=len("Great post. Hash"))
+    out = {}
+    chunks = list(stream_post(model, "Ana", "Engineer", "Tech", "AI", out=out))
+    assert "Hash" not in "".join(chunks)
+    assert out["hashtags"] == "#a #b"
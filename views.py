@@ -0,0 +1,73 @@
+# views.py
+# Card renderers and calendar helpers for the Calendar, Analytics and Drafts
+# tabs. Cards are handed one page of rows (never the whole table), iterate
+# plain dicts rather than DataFrame.iterrows(), and emit one markdown element
+# per card so the Streamlit delta stays small.
+
+from datetime import date, timedelta
+from html import escape
+
+import streamlit as st
+
+PILL_STYLE = (
+    "background:#1f77b4; color:white; padding:4px 10px; border-radius:15px; "
+    "margin:3px; display:inline-block; font-size:13px;"
+)
+CARD_STYLE = "border:1px solid #333; border-radius:10px; padding:15px; margin-bottom:15px; background:#111;"
+
+
+def day_label(value):
+    """YYYY-MM-DD for a date/datetime/string; today when missing."""
+    if value in (None, "", "None"):
+        return date.today().strftime("%Y-%m-%d")
+    return value.strftime("%Y-%m-%d") if hasattr(value, "strftime") else str(value)[:10]
+
+
+def month_groups(rows, key="schedule_date"):
+    """Split rows (already sorted) into [(month label, rows)] runs, e.g. ("March 2025", [...])."""
+    groups = []
+    for row in rows:
+        value = row.get(key)
+        label = value.strftime("%B %Y") if hasattr(value, "strftime") else "No date"
+        if not groups or groups[-1][0] != label:
+            groups.append((label, []))
+        groups[-1][1].append(row)
+    return groups
+
+
+def calendar_weeks(anchor, month=True):
+    """Weeks (lists of 7 dates, Monday first) covering anchor's month, or just its week."""
+    first = anchor.replace(day=1) if month else anchor
+    last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1) if month else anchor
+    day = first - timedelta(days=first.weekday())
+    weeks = []
+    while day <= last:
+        weeks.append([day + timedelta(days=i) for i in range(7)])
+        day += timedelta(days=7)
+    return weeks
+
+
+def card_html(schedule_date, content, hashtags):
+    """Post/draft card with pill-style hashtags as a single HTML block."""
+    pills = "".join(
+        f"<span style='{PILL_STYLE}'>{escape(tag)}</span>" for tag in str(hashtags or "").split()
+    )
+    return (
+        f"<div style=\"{CARD_STYLE}\">"
+        f"<p style='color:#aaa; margin-bottom:8px;'>📅 {day_label(schedule_date) if schedule_date else 'No date'}</p>"
+        f"<p style='color:white; font-size:15px; white-space:pre-wrap;'>{escape(content or '')}</p>"
+        f"<div style='margin-top:10px;'>{pills}</div></div>"
+    )
+
+
+def render_cards(rows, actions=None, group_by_month=False):
+    """Render one card per row; `actions(row)` adds that row's buttons below its card."""
+    groups = month_groups(rows) if group_by_month else [(None, rows)]
+    for label, group in groups:
+        if label:
+            st.markdown(f"#### 🗓️ {label}")
+        for row in group:
+            st.markdown(card_html(row.get("schedule_date"), row.get("content"), row.get("hashtags")),
+                        unsafe_allow_html=True)
+            if actions:
+                actions(row)